@@ -0,0 +1,3 @@
+from mongorm import lazy_module
+
+lazy_module.install(__name__, {name: ("jinx.platform." + name, None) for name in ("ui", "window")})
@@ -0,0 +1,3 @@
+import jinxicon
+
+jinxicon.loadResources()
@@ -3,9 +3,13 @@ from jinxicon import icon_paths
 
 
 class UiSearchBar(QtWidgets.QLineEdit):
+
+    searchRequested = QtCore.Signal(str)
+
     def __init__(self, height=42):
         super(UiSearchBar, self).__init__()
         self.setMinimumHeight(height)
+        self.returnPressed.connect(lambda: self.searchRequested.emit(self.text()))
         self.setIcon(QtGui.QIcon(icon_paths.ICON_SEARCH_LRG))
         self.setStyleSheet("""
                     QLineEdit{
@@ -20,6 +24,35 @@ class UiSearchBar(QtWidgets.QLineEdit):
         else:
             self.setTextMargins(1, 1, 1, 1)
 
+    def expression(self, defaultField="label"):
+        """
+        Return the search text as a mongorm filter expression for DataFilter.where(), None when
+        the text is empty or malformed (the error is shown as the tooltip)
+        """
+        from mongorm.core import filter_expression
+        try:
+            expression = filter_expression.parseSearchText(self.text(), defaultField=defaultField)
+        except ValueError as e:
+            self.setToolTip(str(e))
+            return None
+        self.setToolTip("")
+        return expression
+
+    def applyTo(self, dataSource, defaultField="label"):
+        """
+        Set the search text as dataSource's search expression, return False when the text is
+        malformed or the data source rejects it (the error is shown as the tooltip)
+        """
+        from mongorm.core import filter_expression
+        try:
+            expression = filter_expression.parseSearchText(self.text(), defaultField=defaultField)
+            dataSource.setSearchExpression(expression)
+        except ValueError as e:
+            self.setToolTip(str(e))
+            return False
+        self.setToolTip("")
+        return True
+
     def paintEvent(self, event):
         super(UiSearchBar, self).paintEvent(event)
         if not self.icon.isNull():
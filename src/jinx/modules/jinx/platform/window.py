@@ -4,8 +4,7 @@ from jinx.platform.ui import (
     ui_stem_viewer,
     ui_twig_viewer,
     )
-from jinxqt.widget import base_main_window
-import qdarkstyle
+from jinxqt.widget import base_main_window, db_stats_label
 import sys
 
 
@@ -17,6 +16,7 @@ class JinxPlatformMain(base_main_window.BaseMainWindow):
         self.stem_control_splitter = QtWidgets.QSplitter()
         self.stem_viewer_widget = ui_stem_viewer.UiStemViewer()
         self.twig_viewer_widget = ui_twig_viewer.UiTwigViewer()
+        self.db_stats_label = db_stats_label.DbStatsLabel()
 
     def create_layouts(self):
         pass
@@ -28,12 +28,14 @@ class JinxPlatformMain(base_main_window.BaseMainWindow):
         self.mainLayout.addWidget(self.stem_control_splitter)
         self.stem_control_splitter.addWidget(self.stem_viewer_widget)
         self.stem_control_splitter.addWidget(self.twig_viewer_widget)
+        self.status_bar.addPermanentWidget(self.db_stats_label)
 
     def setup_styles(self):
         pass
 
 
 if __name__ == '__main__':
+    import qdarkstyle
     app = QtWidgets.QApplication(sys.argv)
     app.setStyleSheet(qdarkstyle.load_stylesheet_pyside2())
     win = JinxPlatformMain()
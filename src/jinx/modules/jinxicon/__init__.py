@@ -0,0 +1,28 @@
+"""
+Jinx icon set.
+
+icon_paths only holds the ":/jinxicon/img/..." resource paths as plain strings, so non-GUI code
+(mongorm field definitions) can reference icons without importing Qt. Qt code must call
+loadResources() once before the paths are used by a QIcon or QPixmap; jinxqt and jinx.platform.ui
+do this when imported.
+"""
+import os
+
+RCC_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), "jinxicon.rcc"))
+
+_RESOURCES_LOADED = False
+
+
+def loadResources():
+    """
+    Register the icon resources with Qt, safe to call more than once.
+
+    The binary jinxicon.rcc is memory mapped by Qt and shared between processes. The generated
+    jinxicon_rcc module is only imported when the binary file is missing or fails to register.
+    """
+    global _RESOURCES_LOADED
+    if not _RESOURCES_LOADED:
+        from qtpy import QtCore
+        if not (os.path.isfile(RCC_FILE) and QtCore.QResource.registerResource(RCC_FILE)):
+            from jinxicon import jinxicon_rcc
+        _RESOURCES_LOADED = True
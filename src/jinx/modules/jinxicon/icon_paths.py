@@ -1,6 +1,3 @@
-from jinxicon import jinxicon_rcc
-
-
 ICON_ASSET_LRG = ":/jinxicon/img/ICON_ASSET_LRG.png"
 ICON_ASSET_MED = ":/jinxicon/img/ICON_ASSET_MED.png"
 ICON_ASSET_SML = ":/jinxicon/img/ICON_ASSET_SML.png"
@@ -5,6 +5,7 @@ IMG_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "img"))
 ICON_PATHS_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), "icon_paths.py"))
 QRC_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), "jinxicon.qrc"))
 RCC_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), "jinxicon_rcc.py"))
+RCC_BINARY_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), "jinxicon.rcc"))
 
 # This section for updating the variables list
 img_list = []
@@ -25,7 +26,10 @@ qrc_file.write("  </qresource>\n")
 qrc_file.write("</RCC>\n")
 qrc_file.close()
 
-# write rcc file
+# write binary rcc file, registered with QResource by jinxicon.loadResources()
+subprocess.call('rcc -binary {} -o {}'.format(QRC_FILE, RCC_BINARY_FILE), shell=True)
+
+# write fallback python rcc file
 subprocess.call('pyside2-rcc {} -o {}'.format(QRC_FILE, RCC_FILE), shell=True)
 rcc_file = open(RCC_FILE, "rt")
 rcc_text = rcc_file.readlines()
@@ -37,7 +41,6 @@ rcc_file.close()
 
 # write icon_paths file
 ip_file = open(ICON_PATHS_FILE, "w")
-ip_file.write("from jinxicon import jinxicon_rcc"+'\n'+'\n'+'\n')
 for var in img_list:
     ip_file.write(var[1]+'\n')
 
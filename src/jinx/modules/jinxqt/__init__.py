@@ -1 +1,6 @@
-from jinxqt import common
\ No newline at end of file
+import jinxicon
+from mongorm import lazy_module
+
+jinxicon.loadResources()
+
+lazy_module.install(__name__, {name: ("jinxqt." + name, None) for name in ("common", "core", "modelview", "widget")})
@@ -0,0 +1,171 @@
+"""
+Result cache of the jinx data sources.
+
+Keeps the items of previous fetches so that going back to a stem, re-sorting or refreshing doesn't
+query again. Results are kept per filter predicate (CachedResults), in chunks of one fetched batch
+indexed by their row offset and grouped by sort criteria. Once every row of a predicate has been
+loaded the complete set answers any sort criteria by sorting in memory.
+
+The cache holds up to DEFAULT_ITEM_LIMIT model items, least recently used predicates are dropped
+first. clear(interfaceName) drops the results that involve an interface after it was written to.
+"""
+import collections
+import logging
+
+import pymongo
+
+_LOGGER = logging.getLogger(__name__)
+
+# Model items kept per data source, children included
+DEFAULT_ITEM_LIMIT = 50000
+
+
+def _itemCount(itemList):
+    return sum(len(item.iterTree(includeRoot=True)) for item in itemList)
+
+
+class CachedResults(object):
+    """
+    The results of one filter predicate, independently of sort criteria and offset. Broken up into
+    chunks, each one fetched batch of items indexed by its offset.
+    """
+
+    class SortedCacheSet(object):
+        def __init__(self, sortCriteria):
+            self.sortCriteria = sortCriteria
+            self.itemChunks = {}
+            self.complete = False
+
+        def loadedCount(self):
+            return sum(len(itemList) for itemList in self.itemChunks.values())
+
+        def items(self):
+            itemList = []
+            for offset in sorted(self.itemChunks):
+                itemList.extend(self.itemChunks[offset])
+            return itemList
+
+    def __init__(self, interface, batchSize):
+        self._interface = interface
+        self._batchSize = batchSize
+        self._completeSet = None
+        self._partialSets = {}
+        self._itemCount = 0
+        self.totalCount = -1
+
+    def itemCount(self):
+        return self._itemCount
+
+    def sortItems(self, itemList, sortCriteria):
+        """Sort itemList in place the way the server sorts the top level objects"""
+        fieldNames = [field.db_name() for field in self._interface.getFields()]
+        keys = [(field, direction) for field, direction in sortCriteria if field in fieldNames]
+        if self._batchSize and "_id" not in [field for field, direction in keys]:
+            keys.append(("_id", pymongo.ASCENDING))
+        if not keys:
+            # unsorted results are ordered by label, see DataContainer
+            keys = [("label", pymongo.ASCENDING)]
+
+        # stable sorts from the last key to the first, nulls sort first
+        for field, direction in reversed(keys):
+            itemList.sort(key=lambda item: (item.dataObject.get(field) is not None, item.dataObject.get(field)),
+                          reverse=direction == pymongo.DESCENDING)
+
+    def getItems(self, sortCriteria, offset):
+        """Return the chunk of items at offset in sortCriteria order, None if it isn't cached"""
+        if self._completeSet is not None:
+            if self._completeSet.sortCriteria != sortCriteria:
+                itemList = self._completeSet.items()
+                self.sortItems(itemList, sortCriteria)
+                self._completeSet.sortCriteria = sortCriteria
+                self._completeSet.itemChunks = {}
+                step = self._batchSize or max(len(itemList), 1)
+                for start in range(0, max(len(itemList), 1), step):
+                    self._completeSet.itemChunks[start] = itemList[start:start + step]
+            return self._completeSet.itemChunks.get(offset)
+
+        cacheSet = self._partialSets.get(sortCriteria)
+        if cacheSet is None:
+            return None
+        return cacheSet.itemChunks.get(offset)
+
+    def addItems(self, sortCriteria, offset, itemList):
+        """Add a fetched chunk, a chunk smaller than a batch is the last one"""
+        cacheSet = self._partialSets.get(sortCriteria)
+        if cacheSet is None:
+            cacheSet = self._partialSets[sortCriteria] = self.SortedCacheSet(sortCriteria)
+        if offset in cacheSet.itemChunks:
+            self._itemCount -= _itemCount(cacheSet.itemChunks[offset])
+        cacheSet.itemChunks[offset] = itemList
+        self._itemCount += _itemCount(itemList)
+
+        if not self._batchSize or len(itemList) < self._batchSize:
+            if cacheSet.loadedCount() == offset + len(itemList):
+                # every row is loaded, the complete set serves all sort criteria from now on
+                self.totalCount = offset + len(itemList)
+                self._completeSet = cacheSet
+                self._partialSets = {}
+                self._itemCount = _itemCount(cacheSet.items())
+
+    def isComplete(self):
+        return self._completeSet is not None
+
+
+class DataSourceCache(object):
+    """CachedResults of a data source by filter predicate, capped at itemLimit model items"""
+
+    def __init__(self, dataSource, itemLimit=DEFAULT_ITEM_LIMIT):
+        self._dataSource = dataSource
+        self._itemLimit = itemLimit
+        self._results = collections.OrderedDict()
+        self._interfaces = {}
+
+    def _key(self, dataFilter):
+        return dataFilter.filterKey(), repr(dataFilter.projection()), dataFilter.readPolicy()
+
+    def clear(self, interfaceName=None):
+        """Drop every result, or only the results involving the interface named interfaceName"""
+        if interfaceName is None:
+            self._results.clear()
+            self._interfaces.clear()
+            return
+        for key in [key for key, names in self._interfaces.items() if interfaceName in names]:
+            self._results.pop(key, None)
+            self._interfaces.pop(key, None)
+
+    def itemCount(self):
+        return sum(results.itemCount() for results in self._results.values())
+
+    def results(self, dataFilter):
+        """Return the CachedResults of the filter's predicate, None if nothing of it is cached"""
+        key = self._key(dataFilter)
+        results = self._results.pop(key, None)
+        if results is not None:
+            self._results[key] = results
+        return results
+
+    def getItems(self, dataFilter, offset):
+        """Return the cached chunk of items at offset for the filter, None if it isn't cached"""
+        results = self.results(dataFilter)
+        if results is None:
+            return None
+        return results.getItems(tuple(dataFilter.getSort()), offset)
+
+    def addItems(self, dataFilter, offset, itemList):
+        key = self._key(dataFilter)
+        results = self._results.pop(key, None)
+        if results is None:
+            results = CachedResults(self._dataSource.interface, self._dataSource.batchSize)
+            self._interfaces[key] = frozenset(interface.name() for interface in self._dataSource.allInterfaces)
+        self._results[key] = results
+        results.addItems(tuple(dataFilter.getSort()), offset, itemList)
+        self._evict()
+
+    def _evict(self):
+        itemCount = self.itemCount()
+        while self._results and itemCount > self._itemLimit:
+            key, results = self._results.popitem(last=False)
+            self._interfaces.pop(key, None)
+            itemCount -= results.itemCount()
+            _LOGGER.debug("Result cache over {} items, dropped a result set of {}".format(
+                self._itemLimit, results.itemCount()))
@@ -190,6 +190,13 @@ class TwigDataSource(JinxDataSource):
 
         return {QtCore.Qt.DisplayRole: value}
 
+    def createNewItems(self):
+        # twigs come with their stalks and leafs in one round trip, makeItems() walks them without querying
+        dataContainer = self._interface.fetchSubtree(self._filter)
+        itemList = self.makeItems(dataContainer)
+
+        return itemList, dataContainer
+
     def makeItems(self, dataContainer):
         interfaceName = dataContainer.interfaceName()
 
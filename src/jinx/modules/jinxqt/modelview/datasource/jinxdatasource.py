@@ -6,6 +6,7 @@ import mongorm
 
 from jinxqt import common
 from jinxqt.modelview.model_item import ModelItem
+from jinxqt.modelview.datasource.datasource_cache import DataSourceCache
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -30,6 +31,7 @@ class JinxDataSource(QtCore.QObject):
 
     dataNeedsRefresh = QtCore.Signal()
     totalCountChanged = QtCore.Signal(int)
+    _countFinished = QtCore.Signal(object, int)
 
     COLUMN_HEADER_ORDER = []
     ROLE_COLUMN_DESCRIPTER = common.registerDataRole()
@@ -47,6 +49,18 @@ class JinxDataSource(QtCore.QObject):
     def needToRefresh(self):
         return self._needToRefresh
 
+    @property
+    def batchSize(self):
+        return self._batchSize
+
+    @property
+    def interface(self):
+        return self._interface
+
+    @property
+    def allInterfaces(self):
+        return list(self._allInterfaces)
+
     def __init__(self, sourceInterface=None, additionalInterfaces=[], parent=None):
         super(JinxDataSource, self).__init__(parent)
         self._model = None
@@ -61,6 +75,11 @@ class JinxDataSource(QtCore.QObject):
         ]
         self._allInterfaces = []
         self._totalCount = -1
+        self._batchSize = 0
+        self._canFetchMore = False
+        self._loadedCount = 0
+        self._searchExpression = None
+        self._columnFilters = {}
         self._filter = mongorm.getFilter()
         self._interface = sourceInterface
         self._additionalInterfaces = additionalInterfaces
@@ -77,6 +96,9 @@ class JinxDataSource(QtCore.QObject):
             self._columnList = self._columnHeaderMap.keys()
 
         self._headerItem = self._createHeaderItem(self._columnList)
+        self._filter.only(*self.projectionFields())
+        self._cache = DataSourceCache(self)
+        self._countFinished.connect(self._onCountFinished)
 
     def _generateHeaderMap(self):
         columnHeaderMap = {}
@@ -104,6 +126,10 @@ class JinxDataSource(QtCore.QObject):
 
         return columnHeaderMap
 
+    def projectionFields(self):
+        """Fields the source queries load up front, anything else is fetched when first accessed"""
+        return list(self._columnList)
+
     def _createHeaderItem(self, columnNames):
         itemdata = []
         for columnCode in columnNames:
@@ -145,6 +171,24 @@ class JinxDataSource(QtCore.QObject):
             self._totalCount = totalCount
             self.totalCountChanged.emit(self._totalCount)
 
+    def requestTotalCount(self):
+        """Set the total from the count cache, or count on a worker thread so it arrives independently of the rows"""
+        cached = self._interface.cachedCount(self._filter)
+        if cached is not None:
+            self._setTotalCount(cached)
+            return
+
+        key = self._filter.filterKey()
+        self._interface.countInBackground(self._filter, lambda total: self._countFinished.emit(key, total))
+
+    def _onCountFinished(self, key, totalCount):
+        # drop totals of a filter that has changed since the count started
+        if key == self._filter.filterKey():
+            results = self._cache.results(self._filter)
+            if results is not None:
+                results.totalCount = totalCount
+            self._setTotalCount(totalCount)
+
     def setModel(self, model):
         self._model = model
 
@@ -154,6 +198,57 @@ class JinxDataSource(QtCore.QObject):
             if self._needToRefresh:
                 self.dataNeedsRefresh.emit()
 
+    def setBatchSize(self, batchSize):
+        """Set how many top level objects are loaded per batch, 0 loads everything in one go"""
+        if self._batchSize != batchSize:
+            self._batchSize = batchSize
+            # cached chunks are cut to the old batch size
+            self._cache.clear()
+            self.setNeedToRefresh(True)
+
+    def clearCache(self, interfaceName=None):
+        """Forget cached results, or only those involving the interface named interfaceName, e.g. after publishing to it"""
+        self._cache.clear(interfaceName)
+
+    def reload(self):
+        """Query everything again, the cached results are dropped"""
+        self._cache.clear()
+        self.setNeedToRefresh(True)
+
+    def setSearchExpression(self, expression):
+        """
+        Filter the top level objects with a filter expression, e.g. from UiSearchBar.expression().
+        Raises ValueError, keeping the current filter, if the interface can't run the expression.
+        """
+        self._validateExpression(expression)
+        self._searchExpression = expression
+        self._updateFilterExpression()
+
+    def setColumnFilter(self, columnCode, expression):
+        """Filter a column with an expression on its field, None clears the column's filter. Raises ValueError like setSearchExpression()"""
+        if expression is None:
+            self._columnFilters.pop(columnCode, None)
+        else:
+            self._validateExpression(expression)
+            self._columnFilters[columnCode] = expression
+        self._updateFilterExpression()
+
+    def _validateExpression(self, expression):
+        # unknown fields and values that don't convert would only fail in the next fetch
+        if expression is not None:
+            expression.validate(self._interface.objectPrototype)
+
+    def columnFilters(self):
+        return dict(self._columnFilters)
+
+    def _updateFilterExpression(self):
+        self._filter.clearWhere()
+        expressions = [self._searchExpression] + [self._columnFilters[code] for code in sorted(self._columnFilters)]
+        for expression in expressions:
+            if expression is not None:
+                self._filter.where(expression)
+        self.setNeedToRefresh(True)
+
     def _isSortable(self, dataType):
         return dataType in self._sortableTypes
 
@@ -170,6 +265,10 @@ class JinxDataSource(QtCore.QObject):
                 return field
         return None
 
+    def _getSortField(self, descriptor):
+        # could be reimplemented in subclasses to use custom logic
+        return self._getTopLevelField(descriptor)
+
     def makeItems(self, dataContainer):
         raise NotImplementedError
 
@@ -180,26 +279,48 @@ class JinxDataSource(QtCore.QObject):
         return itemList, dataContainer
 
     def fetchBatch(self, parentIndex):
-        itemList = []
-        itemList, dataContainer = self.createNewItems()
-        totalCount = len(dataContainer)
-
-        self._setTotalCount(totalCount)
+        self._filter.setLimit(self._batchSize)
+        itemList = self._cache.getItems(self._filter, self._loadedCount)
+        if itemList is None:
+            itemList, dataContainer = self.createNewItems()
+            self._cache.addItems(self._filter, self._loadedCount, itemList)
+        self._loadedCount += len(itemList)
+
+        # the next batch starts after the last object rather than skipping the rows already loaded
+        self._canFetchMore = bool(self._batchSize) and len(itemList) == self._batchSize
+        if self._canFetchMore:
+            self._filter.setPageAfter(itemList[-1].dataObject)
 
         return itemList
 
     def fetchItems(self, parentIndex):
+        self._filter.setPageAfter(None)
+        self._loadedCount = 0
+        results = self._cache.results(self._filter)
+        if results is not None and results.totalCount >= 0:
+            self._setTotalCount(results.totalCount)
+        else:
+            self.requestTotalCount()
         itemList = self.fetchBatch(parentIndex)
         # Do sorting here
         return itemList
 
+    def canFetchMore(self, parentIndex):
+        return not parentIndex.isValid() and self._canFetchMore
+
+    def fetchMore(self, parentIndex):
+        if not self.canFetchMore(parentIndex):
+            return
+        itemList = self.fetchBatch(parentIndex)
+        self._model.appendItems(itemList, parentIndex)
+
     def sortByColumns(self, columns, directions, refresh=True):
         # update sort criteria on the filter
         filter = self._filter.clone()
         filter.resetSort()
 
         for (column, direction) in zip(columns, directions):
-            descriptor = self._headerItem.data(column, role=self.ROLE_COLUMN_DESCRIPTOR)
+            descriptor = self._headerItem.data(column, role=self.ROLE_COLUMN_DESCRIPTER)
             if descriptor:
                 if not descriptor.sortable:
                     continue
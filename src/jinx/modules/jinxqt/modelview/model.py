@@ -411,6 +411,16 @@ class Model(QtCore.QAbstractItemModel):
 
         return False
 
+    def canFetchMore(self, parentIndex):
+        # the data source can already be gone when Qt tears the model down
+        if getattr(self, "_dataSource", None):
+            return self._dataSource.canFetchMore(parentIndex)
+        return False
+
+    def fetchMore(self, parentIndex):
+        if self._dataSource:
+            self._dataSource.fetchMore(parentIndex)
+
     def doSort(self, refresh=True):
         """
         """
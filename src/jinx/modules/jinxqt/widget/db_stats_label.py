@@ -0,0 +1,30 @@
+from qtpy import QtWidgets, QtCore
+import mongorm
+
+
+class DbStatsLabel(QtWidgets.QLabel):
+    """Status bar label showing live mongorm connection and round-trip metrics"""
+
+    def __init__(self, interval=1000):
+        super(DbStatsLabel, self).__init__()
+        self.setSizePolicy(QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Minimum)
+        self.setStyleSheet("""
+                    QLabel{
+                        padding: 0px 6px 0px 6px;
+                        color: #a6a6a6;
+                    }
+                """)
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self.refresh)
+        self._timer.start()
+        self.refresh()
+
+    def refresh(self):
+        stats = mongorm.stats()
+        latency = stats["latency"]
+        text = "DB  conn: {}  round trips: {}".format(stats["connections_open"], stats["round_trips"])
+        if stats["bytes_counted"]:
+            text += "  recv: {:.1f} KB".format(stats["bytes_received"] / 1024.0)
+        self.setText(text + "  avg: {:.1f} ms".format(latency["mean_ms"]))
+        self.setToolTip("\n".join("{}: {}".format(name, count) for name, count in sorted(stats["commands"].items())))
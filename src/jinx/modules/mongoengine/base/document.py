@@ -34,6 +34,9 @@ class BaseDocument(object):
     _dynamic_lock = True
     STRICT = False
 
+    # Names of fields left out by a projection, loaded on first access
+    _deferred_fields = frozenset()
+
     def __init__(self, *args, **values):
         """
         Initialise a document or embedded document
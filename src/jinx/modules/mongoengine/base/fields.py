@@ -147,6 +147,14 @@ class BaseField(object):
     def icon(self):
         return self._icon
 
+    def asc(self):
+        """Return an ascending (db name, direction) sort key for this field"""
+        return self.db_field, pymongo.ASCENDING
+
+    def desc(self):
+        """Return a descending (db name, direction) sort key for this field"""
+        return self.db_field, pymongo.DESCENDING
+
     def __get__(self, instance, owner):
         """Descriptor for retrieving a value from a field in a document.
         """
@@ -154,6 +162,9 @@ class BaseField(object):
             # Document class being used rather than a document object
             return self
 
+        if instance._deferred_fields and self.name in instance._deferred_fields:
+            instance._load_deferred_fields()
+
         # Get value from document instance if available
         return instance._data.get(self.name)
 
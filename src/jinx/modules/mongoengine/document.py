@@ -737,6 +737,15 @@ class Document(six.with_metaclass(TopLevelDocumentMetaclass, BaseDocument)):
         self._created = False
         return self
 
+    def _load_deferred_fields(self):
+        """Fetch the fields that were left out when this document was loaded
+        with a projection.
+        """
+        fields = list(self._deferred_fields)
+        self._deferred_fields = frozenset()
+        if self.pk is not None:
+            self.reload(*fields)
+
     def _reload(self, key, value):
         """Used by :meth:`~mongoengine.Document.reload` to ensure the
         correct instance is linked to self.
@@ -4,11 +4,49 @@ LOGGER = logging.getLogger(__name__)
 logging.basicConfig()
 
 
+def getManager():
+    from .base.connection_manager import getManager
+    return getManager()
+
+
 def getHandler():
-    from .base.db_handler import DbHandler
-    return DbHandler()
+    return getManager().handler()
+
+
+def stats():
+    """Return a snapshot of connection pool and round-trip metrics, and of queries collapsed by single-flight"""
+    from .base.monitoring import getStats
+    from .core.single_flight import getGroup
+    snapshot = getStats().snapshot()
+    snapshot["single_flight"] = getGroup().stats()
+    return snapshot
+
+
+def resetStats():
+    from .base.monitoring import getStats
+    from .core.single_flight import getGroup
+    getStats().reset()
+    getGroup().resetStats()
+
+
+def getPlanRecorder():
+    """Return the query plan recorder, see mongorm.core.query_plan"""
+    from .core.query_plan import getRecorder
+    return getRecorder()
 
 
 def getFilter():
     from .core.datafilter import DataFilter
     return DataFilter()
+
+
+# Public names resolved on first access so that "import mongorm" stays cheap
+from mongorm import lazy_module
+lazy_module.install(__name__, {
+    "DbHandler": ("mongorm.base.db_handler", "DbHandler"),
+    "DataFilter": ("mongorm.core.datafilter", "DataFilter"),
+    "DataInterface": ("mongorm.core.datainterface", "DataInterface"),
+    "DataContainer": ("mongorm.core.datacontainer", "DataContainer"),
+    "interfaces": ("mongorm.interfaces", None),
+    "read_policy": ("mongorm.base.read_policy", None),
+})
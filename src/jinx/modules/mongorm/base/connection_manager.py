@@ -0,0 +1,314 @@
+"""
+Process-wide Mongo connection manager.
+
+Owns the single MongoClient used by mongorm (registered as mongoengine's default alias) and the
+DbHandler handed out by mongorm.getHandler(). Everything is created lazily on first use and is
+safe to call from worker threads.
+
+MongoClient is not fork-safe: a forked child (DCC hosts spawning workers) must never reuse the
+parent's sockets. The manager remembers the pid that created the client and builds a fresh client
+the first time it is used from another process, and every Document class drops the collection it
+cached on the parent's client. Threads share the client's pool.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+
+import mongoengine as me
+from mongorm.base import connection_profile, host_resolver, monitoring, read_policy
+
+_LOGGER = logging.getLogger(__name__)
+
+_MANAGER = None
+_MANAGER_LOCK = threading.Lock()
+
+
+class ConnectionManager(object):
+    """
+    Lazily connects to Mongo once per process and shares the client's connection pool
+    between every DbHandler, DataInterface and thread.
+    """
+
+    READ_ALIAS = "jinx-read"
+
+    MAX_POOL_SIZE = 50
+    MIN_POOL_SIZE = 0
+    MAX_IDLE_TIME_MS = 5 * 60 * 1000
+    SERVER_SELECTION_TIMEOUT_MS = 10000
+
+    def __init__(self, database=None, port=None, resolver=None, maxPoolSize=MAX_POOL_SIZE,
+                 minPoolSize=MIN_POOL_SIZE, maxIdleTimeMS=MAX_IDLE_TIME_MS):
+        self._database = database or os.getenv('MONGO_DATABASE')
+        self._port = int(port or os.getenv('MONGO_PORT'))
+        self._resolver = resolver
+        self._readHost = os.getenv('MONGO_READ_IP')
+        self._readClient = None
+        self._maxPoolSize = maxPoolSize
+        self._minPoolSize = minPoolSize
+        self._maxIdleTimeMS = maxIdleTimeMS
+        self._lock = threading.RLock()
+        self._pid = None
+        self._client = None
+        self._handler = None
+        self._host = None
+        self._lastPingMs = None
+        self._profile = None
+        self._profileForced = False
+
+    def resolver(self):
+        return self._resolver or host_resolver.getResolver()
+
+    def host(self):
+        return self._host
+
+    def port(self):
+        return self._port
+
+    def database(self):
+        return self._database
+
+    def profile(self):
+        """Return the connection profile for the resolved host, LAN defaults before connecting"""
+        return self._profile or connection_profile.LAN_PROFILE
+
+    def setProfile(self, profile):
+        """Force a connection profile instead of picking one from the host, the client is recreated on next use"""
+        with self._lock:
+            self.disconnect()
+            self._profile = profile
+            self._profileForced = profile is not None
+
+    def poolSettings(self):
+        return {
+            "maxPoolSize": self._maxPoolSize,
+            "minPoolSize": self._minPoolSize,
+            "maxIdleTimeMS": self._maxIdleTimeMS
+        }
+
+    def setPoolSize(self, maxPoolSize, minPoolSize=None):
+        """Change the pool size, the client is recreated on next use"""
+        with self._lock:
+            self._maxPoolSize = maxPoolSize
+            if minPoolSize is not None:
+                self._minPoolSize = minPoolSize
+            self.disconnect()
+
+    def setIdleTimeout(self, maxIdleTimeMS):
+        """Change how long an idle pooled connection is kept, the client is recreated on next use"""
+        with self._lock:
+            self._maxIdleTimeMS = maxIdleTimeMS
+            self.disconnect()
+
+    def isConnected(self):
+        return self._client is not None
+
+    def connect(self):
+        """Return the shared MongoClient, connecting on first call"""
+        client = self._client
+        if client is not None and self._pid == os.getpid():
+            return client
+
+        self._checkFork()
+
+        with self._lock:
+            if self._client is None:
+                self._host = self.resolver().resolve()
+                if not self._profileForced:
+                    self._profile = connection_profile.profileForHost(self._host)
+                connectArgs = {
+                    "db": self._database,
+                    "host": self._host,
+                    "port": self._port,
+                    "serverSelectionTimeoutMS": self.SERVER_SELECTION_TIMEOUT_MS,
+                    "event_listeners": monitoring.eventListeners()
+                }
+                connectArgs.update(self.poolSettings())
+                connectArgs.update(self._profile.clientOptions())
+                try:
+                    self._client = me.connect(**connectArgs)
+                except Exception:
+                    # the cached route may be the reason, the next attempt probes again
+                    self.resolver().invalidate()
+                    raise
+                self._pid = os.getpid()
+                _LOGGER.debug("Connected to Mongo at {}:{} ({})".format(self._host, self._port, self._profile.name()))
+            return self._client
+
+    def client(self):
+        return self.connect()
+
+    def setReadHost(self, readHost):
+        """Route browse reads to a read-only replica at readHost, None sends them to the main client"""
+        with self._lock:
+            self._disconnectReadClient()
+            self._readHost = readHost
+
+    def readHost(self):
+        return self._readHost
+
+    def readAlias(self):
+        """Return the mongoengine alias browse reads go through"""
+        self.connect()
+        if not self._readHost:
+            return me.DEFAULT_CONNECTION_NAME
+
+        if self._readClient is None:
+            with self._lock:
+                if self._readClient is None:
+                    connectArgs = {
+                        "db": self._database,
+                        "alias": self.READ_ALIAS,
+                        "host": self._readHost,
+                        "port": self._port,
+                        "read_preference": read_policy.readPreference(read_policy.BROWSE),
+                        "serverSelectionTimeoutMS": self.SERVER_SELECTION_TIMEOUT_MS,
+                        "event_listeners": monitoring.eventListeners()
+                    }
+                    connectArgs.update(self.poolSettings())
+                    connectArgs.update(self._profile.clientOptions())
+                    self._readClient = me.connect(**connectArgs)
+        return self.READ_ALIAS
+
+    def _disconnectReadClient(self):
+        if self._readClient is not None:
+            me.connection.disconnect(self.READ_ALIAS)
+        self._readClient = None
+
+    def db(self):
+        self.connect()
+        return me.connection.get_db()
+
+    def disconnect(self):
+        """Close the shared client and drop the cached handler"""
+        self._checkFork()
+        with self._lock:
+            if self._client is not None:
+                me.connection.disconnect()
+                self._disconnectReadClient()
+            self._client = None
+            self._handler = None
+            self._resetCollections()
+            self._clearQueryTemplates()
+
+    def _forgetConnection(self):
+        # Drop mongoengine's references to the client without closing it, the sockets belong to the parent
+        for alias in (me.DEFAULT_CONNECTION_NAME, self.READ_ALIAS):
+            me.connection._connections.pop(alias, None)
+            me.connection._dbs.pop(alias, None)
+        self._readClient = None
+        self._resetCollections()
+
+    def _resetCollections(self):
+        # mongoengine caches each Document class' pymongo Collection, which holds on to the old client:
+        # pymongo would quietly reopen it and the new client's settings would never reach the queries
+        from mongorm.core.datainterface import DATA_OBJECT_MAP
+        for prototype in DATA_OBJECT_MAP.values():
+            prototype._collection = None
+
+    def _clearQueryTemplates(self):
+        # Compiled query templates hold collections of the old client
+        from mongorm.core import query_cache
+        query_cache.clear()
+
+    def _checkFork(self):
+        """Reset what the parent process left behind the first time the manager is used after a fork"""
+        if self._pid is not None and self._pid != os.getpid():
+            _resetSharedState()
+            self._resetAfterFork()
+
+    def _resetAfterFork(self):
+        """Discard the client inherited from the parent process, the next connect() builds a new one"""
+        if self._pid is None or self._pid == os.getpid():
+            return
+        # The parent may have held the lock while forking, it can't be trusted in the child
+        self._lock = threading.RLock()
+        self._forgetConnection()
+        self._client = None
+        self._handler = None
+        self._pid = None
+        _LOGGER.debug("Fork detected, Mongo client reset in child process {}".format(os.getpid()))
+
+    def handler(self):
+        """Return the shared DbHandler"""
+        handler = self._handler
+        if handler is not None and self._pid == os.getpid():
+            return handler
+
+        self.connect()
+
+        with self._lock:
+            if self._handler is None:
+                from mongorm.base.db_handler import DbHandler
+                self._handler = DbHandler(manager=self)
+            return self._handler
+
+    def healthCheck(self):
+        """Ping the server, return True if it answered. The round trip is kept in lastPingMs()"""
+        try:
+            start = time.time()
+            self.connect().admin.command("ping")
+        except Exception as e:
+            _LOGGER.warning("Mongo health check failed: {}".format(e))
+            self._lastPingMs = None
+            self._reroute()
+            return False
+
+        self._lastPingMs = (time.time() - start) * 1000.0
+        return True
+
+    def lastPingMs(self):
+        return self._lastPingMs
+
+    def _reroute(self):
+        """Probe the routes again after a failure, reconnecting on next use if another one answers"""
+        resolver = self.resolver()
+        resolver.invalidate()
+        host = resolver.resolve()
+        if host != self._host:
+            _LOGGER.info("Mongo route changed from {} to {}".format(self._host, host))
+            self.disconnect()
+
+
+def getManager():
+    """Return the process-wide connection manager, creating it on first use"""
+    global _MANAGER
+    if _MANAGER is None:
+        with _MANAGER_LOCK:
+            if _MANAGER is None:
+                _MANAGER = ConnectionManager()
+    return _MANAGER
+
+
+def _resetSharedState():
+    # Locks a parent thread held while forking stay locked forever in the child: replace them, and
+    # what they guard, instead of acquiring them. Modules that were never imported have nothing to reset.
+    monitoring.getStats().resetAfterFork()
+    query_cache = sys.modules.get("mongorm.core.query_cache")
+    if query_cache is not None:
+        query_cache.resetAfterFork()
+    single_flight = sys.modules.get("mongorm.core.single_flight")
+    if single_flight is not None:
+        single_flight.getGroup().resetAfterFork()
+
+
+def _afterForkInChild():
+    global _MANAGER_LOCK
+    _MANAGER_LOCK = threading.Lock()
+    _resetSharedState()
+    if _MANAGER is not None:
+        _MANAGER._resetAfterFork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_afterForkInChild)
+
+
+def setManager(manager):
+    """Replace the process-wide connection manager, the previous one is disconnected"""
+    global _MANAGER
+    with _MANAGER_LOCK:
+        if _MANAGER is not None and _MANAGER is not manager:
+            _MANAGER.disconnect()
+        _MANAGER = manager
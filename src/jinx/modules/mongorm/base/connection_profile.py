@@ -0,0 +1,96 @@
+"""
+Connection profiles.
+
+A profile holds the client and cursor settings that suit a given network route. Sessions routed
+through MONGO_EXT_IP run over a WAN link, so they turn on wire compression and fetch larger
+cursor batches to spend fewer round trips; LAN sessions keep the driver defaults.
+"""
+import os
+
+import pymongo
+
+
+def _availableCompressors(compressors):
+    """Filter compressors down to the ones the installed driver and libraries can use"""
+    if pymongo.version_tuple < (3, 7):
+        return []
+
+    available = []
+    for compressor in compressors:
+        if compressor == "zstd":
+            if pymongo.version_tuple < (3, 9):
+                continue
+            try:
+                import zstandard
+            except ImportError:
+                continue
+        elif compressor == "snappy":
+            try:
+                import snappy
+            except ImportError:
+                continue
+        available.append(compressor)
+
+    return available
+
+
+class ConnectionProfile(object):
+    """Client options and cursor sizing for one kind of network route"""
+
+    def __init__(self, name, compressors=None, zlibCompressionLevel=None, batchSize=None,
+                 connectTimeoutMS=None, serverSelectionTimeoutMS=None):
+        self._name = name
+        self._compressors = list(compressors or [])
+        self._zlibCompressionLevel = zlibCompressionLevel
+        self._batchSize = batchSize
+        self._connectTimeoutMS = connectTimeoutMS
+        self._serverSelectionTimeoutMS = serverSelectionTimeoutMS
+
+    def __repr__(self):
+        return "ConnectionProfile({})".format(self._name)
+
+    def name(self):
+        return self._name
+
+    def compressors(self):
+        return _availableCompressors(self._compressors)
+
+    def batchSize(self):
+        """Cursor batch size for queries on this route, None keeps the driver default"""
+        return self._batchSize
+
+    def clientOptions(self):
+        """Return the MongoClient keyword arguments for this profile"""
+        options = {}
+
+        compressors = self.compressors()
+        if compressors:
+            options["compressors"] = ",".join(compressors)
+            if "zlib" in compressors and self._zlibCompressionLevel is not None:
+                options["zlibCompressionLevel"] = self._zlibCompressionLevel
+
+        if self._connectTimeoutMS is not None:
+            options["connectTimeoutMS"] = self._connectTimeoutMS
+        if self._serverSelectionTimeoutMS is not None:
+            options["serverSelectionTimeoutMS"] = self._serverSelectionTimeoutMS
+
+        return options
+
+
+LAN_PROFILE = ConnectionProfile("lan")
+
+WAN_PROFILE = ConnectionProfile(
+    "wan",
+    compressors=["zstd", "snappy", "zlib"],
+    zlibCompressionLevel=6,
+    batchSize=2000,
+    connectTimeoutMS=20000,
+    serverSelectionTimeoutMS=30000
+)
+
+
+def profileForHost(host):
+    """Return the profile for a resolved host, the WAN profile is used for the external address"""
+    if host and host == os.getenv('MONGO_EXT_IP'):
+        return WAN_PROFILE
+    return LAN_PROFILE
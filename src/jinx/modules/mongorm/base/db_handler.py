@@ -1,31 +1,65 @@
-from mongorm.core.datainterface import DataInterface
-from requests import get
-import mongoengine as me
-import os
+from mongorm.core.datainterface import DataInterface, DATA_OBJECT_MAP
+from mongorm.base import connection_manager
+import threading
 
 
 class DbHandler(object):
-    _DATABASE = os.getenv('MONGO_DATABASE')
-    _PORT = int(os.getenv('MONGO_PORT'))
-    _THIS_EXT_IP = get("https://api.ipify.org").text
-    _MONGO_EXT_IP = os.getenv('MONGO_EXT_IP')
-    _MONGO_INT_IP = os.getenv('MONGO_INT_IP')
 
-    if _THIS_EXT_IP == _MONGO_EXT_IP:
-        _HOST = _MONGO_INT_IP
-    else:
-        _HOST = _MONGO_EXT_IP
-
-    def __init__(self):
-        me.connect(db=self._DATABASE, host=self._HOST, port=self._PORT)
+    def __init__(self, manager=None):
+        self._manager = manager or connection_manager.getManager()
+        self._manager.connect()
+        self._lock = threading.Lock()
+        self._interfaces = None
+        self._collectionNames = None
 
     def __getitem__(self, item):
-        assert item in self.list_interface_names(), "Invalid interface: {}".format(item)
-        return DataInterface(item)
+        interfaces = self._interfaces
+        if interfaces is None:
+            interfaces = self._buildInterfaces()
+
+        assert item in interfaces, "Invalid interface: {}".format(item)
+        return interfaces[item]
+
+    def _buildInterfaces(self):
+        """Build the DataInterface registry from DATA_OBJECT_MAP, keeping the ones that exist on the server"""
+        with self._lock:
+            if self._interfaces is None:
+                collectionNames = self.list_interface_names()
+                self._interfaces = {
+                    name: DataInterface(name) for name in DATA_OBJECT_MAP if name in collectionNames
+                }
+            return self._interfaces
+
+    def refresh(self):
+        """Drop the interface registry, the server is checked again on next lookup"""
+        with self._lock:
+            self._interfaces = None
+            self._collectionNames = None
 
-    def list_interface_names(self):
-        db = me.connection.get_db()
-        return db.list_collection_names()
+    def manager(self):
+        return self._manager
+
+    def host(self):
+        return self._manager.host()
+
+    def list_interface_names(self, refresh=False):
+        if self._collectionNames is None or refresh:
+            db = self._manager.db()
+            self._collectionNames = db.list_collection_names()
+        return list(self._collectionNames)
 
     def getDataInterface(self, dataInterface):
         return self.__getitem__(dataInterface)
+
+    def hasInterface(self, name):
+        """True if the interface named name is in the registry, its collection exists on the server"""
+        interfaces = self._interfaces
+        if interfaces is None:
+            interfaces = self._buildInterfaces()
+        return name in interfaces
+
+    def forgetObject(self, name, uuid):
+        """Drop an object from the get() cache of the interface named name, after it was written to"""
+        interfaces = self._interfaces
+        if interfaces is not None and name in interfaces:
+            interfaces[name].forget(uuid)
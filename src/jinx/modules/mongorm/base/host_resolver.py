@@ -0,0 +1,141 @@
+"""
+Mongo host resolution.
+
+Works out which route (internal LAN or external WAN address) reaches the Mongo server by probing
+the candidates with a short TCP connect, and remembers the winning route on disk so that new
+processes don't have to probe again until the cache expires.
+"""
+import json
+import logging
+import os
+import socket
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".jinx")
+CACHE_FILE = os.path.join(CACHE_DIR, "mongo_host.json")
+
+_RESOLVER = None
+
+
+class HostResolver(object):
+    """
+    Resolve the Mongo host for this machine.
+
+    Candidates are probed in order (MONGO_INT_IP first, then MONGO_EXT_IP), the first one
+    accepting a TCP connection wins. When none answer the last candidate is used so that the
+    driver can surface a proper connection error later on, it is not written to the cache so the
+    next process probes again.
+    """
+
+    CACHE_TTL = 60 * 60 * 12
+    CONNECT_TIMEOUT = 0.5
+
+    def __init__(self, candidates=None, port=None, cacheFile=CACHE_FILE, cacheTtl=CACHE_TTL,
+                 connectTimeout=CONNECT_TIMEOUT):
+        if candidates is None:
+            candidates = [os.getenv('MONGO_INT_IP'), os.getenv('MONGO_EXT_IP')]
+        self._candidates = [host for host in candidates if host]
+        self._port = int(port or os.getenv('MONGO_PORT'))
+        self._cacheFile = cacheFile
+        self._cacheTtl = cacheTtl
+        self._connectTimeout = connectTimeout
+        self._host = None
+
+    def candidates(self):
+        return list(self._candidates)
+
+    def port(self):
+        return self._port
+
+    def resolve(self, refresh=False):
+        """Return the host to connect to, probing the candidates only when the cache is stale"""
+        if self._host and not refresh:
+            return self._host
+
+        host = None if refresh else self._readCache()
+        if host is None:
+            host = self._probeCandidates()
+            if host is not None:
+                self._writeCache(host)
+            else:
+                host = self._candidates[-1]
+                _LOGGER.warning("No Mongo host answered within {}s, falling back to {}".format(
+                    self._connectTimeout, host))
+
+        self._host = host
+        return self._host
+
+    def invalidate(self):
+        """Forget the resolved host, both in memory and on disk"""
+        self._host = None
+        try:
+            os.remove(self._cacheFile)
+        except OSError:
+            pass
+
+    def probe(self, host):
+        """Return True if a TCP connection to host can be opened within the connect timeout"""
+        try:
+            sock = socket.create_connection((host, self._port), self._connectTimeout)
+        except (socket.error, socket.timeout):
+            return False
+        sock.close()
+        return True
+
+    def _probeCandidates(self):
+        """Return the first candidate answering the probe, None if none did"""
+        if not self._candidates:
+            raise RuntimeError("No Mongo host candidates, set MONGO_INT_IP and/or MONGO_EXT_IP")
+
+        for host in self._candidates:
+            if self.probe(host):
+                _LOGGER.debug("Resolved Mongo host: {}".format(host))
+                return host
+
+        return None
+
+    def _readCache(self):
+        try:
+            with open(self._cacheFile, "r") as cacheFile:
+                data = json.load(cacheFile)
+        except (IOError, OSError, ValueError):
+            return None
+
+        if data.get("candidates") != self._candidates or data.get("port") != self._port:
+            return None
+        if time.time() - data.get("time", 0) > self._cacheTtl:
+            return None
+
+        return data.get("host")
+
+    def _writeCache(self, host):
+        data = {
+            "host": host,
+            "port": self._port,
+            "candidates": self._candidates,
+            "time": time.time()
+        }
+        try:
+            cacheDir = os.path.dirname(self._cacheFile)
+            if not os.path.isdir(cacheDir):
+                os.makedirs(cacheDir)
+            with open(self._cacheFile, "w") as cacheFile:
+                json.dump(data, cacheFile)
+        except (IOError, OSError) as e:
+            _LOGGER.debug("Unable to write Mongo host cache: {}".format(e))
+
+
+def getResolver():
+    """Return the process-wide host resolver, creating the default one on first use"""
+    global _RESOLVER
+    if _RESOLVER is None:
+        _RESOLVER = HostResolver()
+    return _RESOLVER
+
+
+def setResolver(resolver):
+    """Replace the process-wide host resolver, eg: to pin a host or use a different lookup"""
+    global _RESOLVER
+    _RESOLVER = resolver
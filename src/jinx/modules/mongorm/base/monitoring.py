@@ -0,0 +1,224 @@
+"""
+Connection pool and round-trip metrics.
+
+Listeners registered on every mongorm client count commands, round trips and pool checkouts, and
+keep a latency histogram per command. mongorm.stats() returns a snapshot.
+
+Payload bytes are the BSON size of commands and replies before wire compression. Measuring them
+encodes every command and reply a second time on the querying thread, so they are only counted
+once enabled with MongoStats.setCountBytes(True) or the MONGORM_COUNT_BYTES environment variable.
+"""
+import bisect
+import os
+import threading
+
+import bson
+from pymongo import monitoring
+
+# Upper bounds (ms) of the latency histogram buckets, the last bucket is open ended
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+
+def _bsonSize(document):
+    if document is None:
+        return 0
+    try:
+        if hasattr(bson, "encode"):
+            return len(bson.encode(document))
+        return len(bson.BSON.encode(document))
+    except Exception:
+        return 0
+
+
+class LatencyHistogram(object):
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self._buckets = list(buckets)
+        self._counts = [0] * (len(self._buckets) + 1)
+        self._total = 0.0
+        self._count = 0
+        self._max = 0.0
+
+    def add(self, ms):
+        self._counts[bisect.bisect_left(self._buckets, ms)] += 1
+        self._total += ms
+        self._count += 1
+        self._max = max(self._max, ms)
+
+    def snapshot(self):
+        labels = ["<={}ms".format(bound) for bound in self._buckets] + [">{}ms".format(self._buckets[-1])]
+        return {
+            "count": self._count,
+            "mean_ms": self._total / self._count if self._count else 0.0,
+            "max_ms": self._max,
+            "buckets": [(label, count) for label, count in zip(labels, self._counts)]
+        }
+
+
+class MongoStats(object):
+    """Thread-safe counters fed by the command and pool listeners"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._countBytes = bool(os.getenv("MONGORM_COUNT_BYTES"))
+        self.reset()
+
+    def countBytes(self):
+        return self._countBytes
+
+    def setCountBytes(self, enabled):
+        """Measure the payload bytes of commands and replies, costs an encoding of each"""
+        self._countBytes = bool(enabled)
+
+    def reset(self):
+        with self._lock:
+            self._roundTrips = 0
+            self._failures = 0
+            self._bytesSent = 0
+            self._bytesReceived = 0
+            self._commands = {}
+            self._latency = LatencyHistogram()
+            self._commandLatency = {}
+            self._connectionsCreated = 0
+            self._connectionsClosed = 0
+            self._checkouts = 0
+            self._checkoutFailures = 0
+            self._checkedOut = 0
+
+    def commandStarted(self, commandName, command):
+        size = _bsonSize(command) if self._countBytes else 0
+        with self._lock:
+            self._roundTrips += 1
+            self._bytesSent += size
+            self._commands[commandName] = self._commands.get(commandName, 0) + 1
+
+    def commandFinished(self, commandName, durationMicros, reply=None, failed=False):
+        size = _bsonSize(reply) if self._countBytes else 0
+        ms = durationMicros / 1000.0
+        with self._lock:
+            self._bytesReceived += size
+            if failed:
+                self._failures += 1
+            self._latency.add(ms)
+            histogram = self._commandLatency.get(commandName)
+            if histogram is None:
+                histogram = self._commandLatency[commandName] = LatencyHistogram()
+            histogram.add(ms)
+
+    def resetAfterFork(self):
+        """Replace the lock in a forked child, a parent thread may have held it while forking. Counters start over"""
+        self._lock = threading.Lock()
+        self.reset()
+
+    def connectionCreated(self):
+        with self._lock:
+            self._connectionsCreated += 1
+
+    def connectionClosed(self):
+        with self._lock:
+            self._connectionsClosed += 1
+
+    def checkedOut(self):
+        with self._lock:
+            self._checkouts += 1
+            self._checkedOut += 1
+
+    def checkedIn(self):
+        with self._lock:
+            self._checkedOut = max(0, self._checkedOut - 1)
+
+    def checkoutFailed(self):
+        with self._lock:
+            self._checkoutFailures += 1
+
+    def meanLatencyMs(self):
+        """Mean command latency, None before the first command"""
+        with self._lock:
+            if not self._latency._count:
+                return None
+            return self._latency._total / self._latency._count
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "round_trips": self._roundTrips,
+                "failures": self._failures,
+                "bytes_sent": self._bytesSent,
+                "bytes_received": self._bytesReceived,
+                "bytes_counted": self._countBytes,
+                "commands": dict(self._commands),
+                "latency": self._latency.snapshot(),
+                "command_latency": {name: h.snapshot() for name, h in self._commandLatency.items()},
+                "connections_open": self._connectionsCreated - self._connectionsClosed,
+                "connections_created": self._connectionsCreated,
+                "checkouts": self._checkouts,
+                "checkout_failures": self._checkoutFailures,
+                "checked_out": self._checkedOut
+            }
+
+
+class CommandStatsListener(monitoring.CommandListener):
+    def __init__(self, stats):
+        self._stats = stats
+
+    def started(self, event):
+        self._stats.commandStarted(event.command_name, event.command)
+
+    def succeeded(self, event):
+        self._stats.commandFinished(event.command_name, event.duration_micros, reply=event.reply)
+
+    def failed(self, event):
+        self._stats.commandFinished(event.command_name, event.duration_micros, failed=True)
+
+
+if hasattr(monitoring, "ConnectionPoolListener"):
+    class PoolStatsListener(monitoring.ConnectionPoolListener):
+        def __init__(self, stats):
+            self._stats = stats
+
+        def pool_created(self, event):
+            pass
+
+        def pool_cleared(self, event):
+            pass
+
+        def pool_closed(self, event):
+            pass
+
+        def connection_created(self, event):
+            self._stats.connectionCreated()
+
+        def connection_ready(self, event):
+            pass
+
+        def connection_closed(self, event):
+            self._stats.connectionClosed()
+
+        def connection_check_out_started(self, event):
+            pass
+
+        def connection_check_out_failed(self, event):
+            self._stats.checkoutFailed()
+
+        def connection_checked_out(self, event):
+            self._stats.checkedOut()
+
+        def connection_checked_in(self, event):
+            self._stats.checkedIn()
+else:
+    # pymongo < 3.9 has no pool events, only command metrics are collected
+    PoolStatsListener = None
+
+
+_STATS = MongoStats()
+
+
+def getStats():
+    return _STATS
+
+
+def eventListeners():
+    """Return the listeners to register on a new MongoClient"""
+    listeners = [CommandStatsListener(_STATS)]
+    if PoolStatsListener is not None:
+        listeners.append(PoolStatsListener(_STATS))
+    return listeners
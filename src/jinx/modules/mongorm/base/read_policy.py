@@ -0,0 +1,44 @@
+"""
+Read routing policies.
+
+BROWSE reads (DataFilter / DataInterface.all from the UI) may be served by a secondary, or by the
+read-only replica set in MONGO_READ_IP, taking load off the primary while publishing. PRIMARY
+reads always hit the primary and are used for read-your-writes lookups after a publish.
+"""
+import contextlib
+import threading
+
+from pymongo import ReadPreference
+
+PRIMARY = "primary"
+BROWSE = "browse"
+DEFAULT_POLICY = BROWSE
+
+_READ_PREFERENCES = {
+    PRIMARY: ReadPreference.PRIMARY,
+    BROWSE: ReadPreference.SECONDARY_PREFERRED
+}
+
+_LOCAL = threading.local()
+
+
+def readPreference(policy):
+    """Return the pymongo read preference for a policy"""
+    return _READ_PREFERENCES[policy]
+
+
+def effectivePolicy(policy):
+    """Return the policy a query should use, primaryReads() overrides browse policies on this thread"""
+    if getattr(_LOCAL, "forcePrimary", 0):
+        return PRIMARY
+    return policy
+
+
+@contextlib.contextmanager
+def primaryReads():
+    """Route every read made on this thread to the primary, eg: lookups right after a publish"""
+    _LOCAL.forcePrimary = getattr(_LOCAL, "forcePrimary", 0) + 1
+    try:
+        yield
+    finally:
+        _LOCAL.forcePrimary -= 1
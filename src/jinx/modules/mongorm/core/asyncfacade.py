@@ -0,0 +1,100 @@
+"""
+asyncio facade for mongorm queries.
+
+The blocking mongorm calls run on a shared thread pool (the connection pool is thread-safe) and
+come back to the event loop as awaitables, so headless tools or a qasync-driven UI can overlap
+many round trips with asyncio.gather instead of running them one after another.
+
+Needs Python 3's asyncio; under Python 2 this module imports but the facade raises on use.
+"""
+import collections
+import functools
+import threading
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    ThreadPoolExecutor = None
+
+MAX_WORKERS = 8
+
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def getExecutor():
+    """Return the thread pool the async facade runs blocking calls on"""
+    global _EXECUTOR
+    if asyncio is None or ThreadPoolExecutor is None:
+        raise RuntimeError("The mongorm async facade requires Python 3 (asyncio, concurrent.futures)")
+
+    if _EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is None:
+                _EXECUTOR = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    return _EXECUTOR
+
+
+def setMaxWorkers(maxWorkers):
+    """Resize the pool, the current one is shut down once its pending calls finish"""
+    global _EXECUTOR, MAX_WORKERS
+    with _EXECUTOR_LOCK:
+        MAX_WORKERS = maxWorkers
+        if _EXECUTOR is not None:
+            _EXECUTOR.shutdown(wait=False)
+            _EXECUTOR = None
+
+
+def runAsync(func, *args, **kwargs):
+    """Run a blocking call on the executor and return an awaitable for its result"""
+    executor = getExecutor()
+    loop = asyncio.get_event_loop()
+    return loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+
+class AsyncResultIterator(object):
+    """
+    Async iterator over a query's results.
+
+    Objects are pulled from the cursor on the executor a batch at a time, so only one executor
+    hop is paid per batch rather than per object:
+
+        async for stalk in db['stalk'].iter_async(filt):
+            ...
+    """
+
+    def __init__(self, querySet, batchSize=100):
+        self._querySet = querySet
+        self._iterator = None
+        self._batchSize = batchSize
+        self._buffer = collections.deque()
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        if self._buffer:
+            future = asyncio.get_event_loop().create_future()
+            future.set_result(self._buffer.popleft())
+            return future
+
+        return runAsync(self._fetchNext)
+
+    def _fetchNext(self):
+        if self._iterator is None:
+            self._iterator = iter(self._querySet)
+
+        for object in self._iterator:
+            self._buffer.append(object)
+            if len(self._buffer) >= self._batchSize:
+                break
+
+        if not self._buffer:
+            raise StopAsyncIteration
+
+        return self._buffer.popleft()
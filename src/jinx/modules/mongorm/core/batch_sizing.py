@@ -0,0 +1,124 @@
+"""
+Adaptive cursor batch sizing.
+
+A fixed batch size is wrong both ways: large scans make many getMore round trips, tiny lookups ask
+for batches they will never fill. DataFilter sizes each query's batches from what it knows:
+
+    * the expected result size, from a unique key, the filter's limit or its cached count: the
+      result comes back in as few replies as fit it, one when it is under the 16MB reply limit,
+    * otherwise the connection latency, the last ping or the mean command latency in
+      mongorm.stats(): the slower the link the more bytes each round trip carries,
+    * the projected document width, estimated from the loaded fields' types, turns bytes into
+      a document count.
+
+With neither the connection profile's batch size is kept. DataFilter.setBatchSize() fixes the
+batch size of one filter's queries.
+
+The size chosen for a query shape and expected count is memoized for MEMO_TTL seconds, relationship
+lookups run the same shape thousands of times and the latency it depends on drifts slowly.
+"""
+import time
+
+import mongoengine
+
+# A reply never carries more than 16MB, no point in asking for more
+MAX_BATCH_BYTES = 16 * 1024 * 1024
+# Bytes per round trip on a link with no measurable latency
+MIN_BATCH_BYTES = 1024 * 1024
+# Extra bytes per round trip for every millisecond of latency
+BYTES_PER_LATENCY_MS = 256 * 1024
+
+MIN_BATCH_SIZE = 2
+MAX_BATCH_SIZE = 100000
+
+# Seconds a memoized batch size is used before it is chosen again
+MEMO_TTL = 30
+MAX_MEMOIZED = 4096
+
+# Estimated BSON size of a value per field type, the field name and type byte come on top
+_FIELD_BYTES = (
+    (mongoengine.UUIDField, 21),
+    (mongoengine.BooleanField, 1),
+    (mongoengine.IntField, 4),
+    (mongoengine.FloatField, 8),
+    (mongoengine.DateTimeField, 8),
+    (mongoengine.StringField, 32),
+    (mongoengine.ListField, 64),
+    (mongoengine.DictField, 128),
+)
+_DEFAULT_FIELD_BYTES = 32
+
+
+_documentBytes = {}
+_memoized = {}
+
+
+def estimateDocumentBytes(document, fieldNames=None):
+    """
+    Estimated BSON size of a Document class' documents, holding only the attributes in the
+    frozenset fieldNames if given
+    """
+    key = (document, fieldNames)
+    size = _documentBytes.get(key)
+    if size is None:
+        size = _documentBytes[key] = _estimateDocumentBytes(document, fieldNames)
+    return size
+
+
+def _estimateDocumentBytes(document, fieldNames):
+    size = 5
+    for name, field in document._fields.items():
+        if fieldNames is not None and name not in fieldNames:
+            continue
+        valueBytes = _DEFAULT_FIELD_BYTES
+        for fieldType, fieldBytes in _FIELD_BYTES:
+            if isinstance(field, fieldType):
+                valueBytes = fieldBytes
+                break
+        size += len(field.db_field) + 2 + valueBytes
+    return size
+
+
+def connectionLatencyMs(manager):
+    """Round trip time of the connection, None until it has been measured"""
+    latency = manager.lastPingMs()
+    if latency is not None:
+        return latency
+
+    from mongorm.base.monitoring import getStats
+    return getStats().meanLatencyMs()
+
+
+def chooseBatchSize(expectedCount=None, documentBytes=None, latencyMs=None, defaultBatchSize=None):
+    """
+    Return the cursor batch size for a query expected to return expectedCount documents of
+    documentBytes each over a link of latencyMs, defaultBatchSize when nothing is known
+    """
+    if expectedCount is not None:
+        # one more than expected lets the server close the cursor with the last batch
+        batchSize = expectedCount + 1
+        if documentBytes:
+            batchSize = min(batchSize, MAX_BATCH_BYTES // documentBytes)
+    elif latencyMs is not None and documentBytes:
+        batchBytes = min(MAX_BATCH_BYTES, MIN_BATCH_BYTES + latencyMs * BYTES_PER_LATENCY_MS)
+        batchSize = int(batchBytes // documentBytes)
+    else:
+        batchSize = defaultBatchSize
+
+    if batchSize is None:
+        return None
+    return max(MIN_BATCH_SIZE, min(MAX_BATCH_SIZE, batchSize))
+
+
+def memoize(key, choose):
+    """Return the batch size memoized for key if chosen within MEMO_TTL seconds, else choose() and memoize it"""
+    now = time.time()
+    entry = _memoized.get(key)
+    if entry is not None and now - entry[1] <= MEMO_TTL:
+        return entry[0]
+
+    if len(_memoized) >= MAX_MEMOIZED:
+        _memoized.clear()
+    batchSize = choose()
+    _memoized[key] = (batchSize, now)
+    return batchSize
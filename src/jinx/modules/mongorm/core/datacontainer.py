@@ -1,18 +1,27 @@
-from mongorm.core.dataobject import BaseJinxObject
+from mongorm.core.datafilter import DataFilter
+from mongorm.core.dataobject import BaseJinxObject, RawJinxObject
+import pymongo
 
 
 class DataContainer(object):
-    def __init__(self, interface, querySet=None):
+    def __init__(self, interface, querySet=None, deferredFields=None, serverSorted=False, raw=False):
         self._objects = []
         self._interface = interface
-        if querySet:
+        if querySet is not None:
+            if raw:
+                querySet = DataFilter.reapplyBatchSize(querySet, querySet.as_pymongo())
+                querySet = (RawJinxObject(interface, document) for document in querySet)
             for object in querySet:
+                if deferredFields:
+                    object._deferred_fields = deferredFields
                 self.append_object(object)
-            self.sort("label")
+            # results ordered by the query keep the server order
+            if not serverSorted:
+                self.sort("label")
 
     def append_object(self, object):
 
-        assert isinstance(object, BaseJinxObject), "Object must be DataObject instance"
+        assert isinstance(object, (BaseJinxObject, RawJinxObject)), "Object must be DataObject instance"
 
         if not object.interfaceName() == self._interface.name():
             raise TypeError("Data Object of type ({}) does not match with DataContainer type ({})".format(
@@ -42,7 +51,7 @@ class DataContainer(object):
         return self._objects[item]
 
     def get(self, object):
-        assert isinstance(object, BaseJinxObject), "Object must be DataObject instance"
+        assert isinstance(object, (BaseJinxObject, RawJinxObject)), "Object must be DataObject instance"
 
         for obj in self._objects:
             if object.getUuid() == obj.getUuid():
@@ -50,6 +59,12 @@ class DataContainer(object):
 
         raise ValueError("DataObject does not exist in DataContainer")
 
+    def copy(self):
+        """Return a container of the same objects, adding, removing or sorting leaves this one as it is"""
+        other = DataContainer(self._interface)
+        other._objects = list(self._objects)
+        return other
+
     def dataInterface(self):
         return self._interface
 
@@ -61,4 +76,112 @@ class DataContainer(object):
             raise RuntimeError(
                 "Invalid sort field ({}) for DataInterface ({})".format(sort_field, self.interfaceName()))
         self._sortField = sort_field
-        self._objects = sorted(self._objects, key=lambda i: i.get(sort_field), reverse=reverse)
\ No newline at end of file
+        self._objects = sorted(self._objects, key=lambda i: i.get(sort_field), reverse=reverse)
+
+
+class LazyDataContainer(DataContainer):
+    """
+    DataContainer that leaves its results on the server. len() is a count query, iteration streams
+    the cursor and slices are fetched as pages, following on from the previous page's last object
+    through the keyset cursor when they can and with a skip otherwise.
+
+    Iteration and pages read the same order: the filter's sort, or label like DataContainer when it
+    has none, ties broken by _id.
+    """
+
+    def __init__(self, interface, dataFilter, batchSize=None):
+        super(LazyDataContainer, self).__init__(interface)
+        self._filter = dataFilter.clone()
+        self._filter.setLimit(0)
+        self._filter.setPageAfter(None)
+        self._orderFilter()
+        self._batchSize = batchSize
+        self._pageCursors = {}
+
+    def _orderFilter(self):
+        if not self._filter.getSort():
+            self._filter.sort(("label", pymongo.ASCENDING))
+        if "_id" not in [field for field, direction in self._filter.getSort()]:
+            self._filter.sort(("_id", pymongo.ASCENDING))
+
+    def dataFilter(self):
+        return self._filter
+
+    def copy(self):
+        """Return a lazy container over the same results, sorting it leaves this one as it is"""
+        return LazyDataContainer(self._interface, self._filter, batchSize=self._batchSize)
+
+    def append_object(self, object):
+        raise NotImplementedError("LazyDataContainer is read only")
+
+    def remove_object(self, object):
+        raise NotImplementedError("LazyDataContainer is read only")
+
+    def size(self):
+        return self._interface.count(self._filter)
+
+    def __iter__(self):
+        return self._interface.iter(self._filter, batch_size=self._batchSize)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            indexes = range(*item.indices(len(self)))
+            container = DataContainer(self._interface)
+            if indexes:
+                first = min(indexes)
+                objects = self._page(first, max(indexes) - first + 1)
+                for index in indexes:
+                    if index - first < len(objects):
+                        container.append_object(objects[index - first])
+            return container
+
+        index = item + len(self) if item < 0 else item
+        objects = self._page(index, 1) if index >= 0 else []
+        if not objects:
+            raise IndexError("LazyDataContainer index out of range")
+        return objects[0]
+
+    def _page(self, start, count):
+        if count <= 0:
+            return []
+
+        page = self._filter.clone()
+        page.setLimit(count)
+        cursor = self._pageCursors.get(start)
+        if start == 0 or cursor is not None:
+            page.setPageAfter(cursor)
+            querySet = page.querySet()
+        else:
+            querySet = page.querySet()
+            querySet = DataFilter.reapplyBatchSize(querySet, querySet.skip(start))
+
+        objects = list(querySet)
+        deferredFields = page.deferredFields()
+        for object in objects:
+            if deferredFields:
+                object._deferred_fields = deferredFields
+
+        if objects:
+            page.setPageAfter(objects[-1])
+            self._pageCursors[start + len(objects)] = page.pageAfter()
+        return objects
+
+    def get(self, object):
+        assert isinstance(object, (BaseJinxObject, RawJinxObject)), "Object must be DataObject instance"
+
+        lookup = self._filter.clone()
+        lookup.search(self._interface, uuid=object.getUuid())
+        if list(lookup.querySet().limit(1)):
+            return object
+
+        raise ValueError("DataObject does not exist in DataContainer")
+
+    def sort(self, sort_field, reverse=False):
+        if sort_field not in [field.db_name() for field in self._interface.getFields()]:
+            raise RuntimeError(
+                "Invalid sort field ({}) for DataInterface ({})".format(sort_field, self.interfaceName()))
+        self._sortField = sort_field
+        self._filter.resetSort()
+        self._filter.sort((sort_field, pymongo.DESCENDING if reverse else pymongo.ASCENDING))
+        self._orderFilter()
+        self._pageCursors = {}
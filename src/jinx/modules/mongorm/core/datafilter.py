@@ -1,9 +1,18 @@
 """
 DataFilter base class
 """
+import copy
+import mongorm
+import pymongo
+from mongorm.base import read_policy
+from mongorm.core import batch_sizing, query_cache, query_plan
 
 
 class DataFilter(object):
+
+    # Fields every projected query still loads, objects are identified and sorted by them
+    REQUIRED_FIELDS = ("_id", "uuid", "label")
+
     def __init__(self):
         self._filter = None
         self._interface = None
@@ -12,16 +21,345 @@ class DataFilter(object):
         self._objects = []
         self._omitDeleted = True
         self._omitArchived = True
+        self._readPolicy = read_policy.DEFAULT_POLICY
+        self._onlyFields = []
+        self._excludeFields = []
+        self._sort = ()
+        self._limit = 0
+        self._pageAfter = None
+        self._expression = None
+        self._batchSize = None
 
     def filter(self):
         return self._filter
 
-    def querySet(self):
-        self._querySet = self._interface.objectPrototype.objects(**self._filterStrings)
+    def querySet(self, paged=True):
+        """Build the queryset, paged=False leaves out the limit and the keyset page cursor"""
+        self._querySet = self._buildQuerySet(paged)
+        recorder = query_plan.getRecorder()
+        if recorder.enabled():
+            recorder.observe(self._querySet)
         return self._querySet
 
-    def count(self):
-        return len(self.objects())
+    def _buildQuerySet(self, paged=True):
+        queryStrings = self.queryStrings()
+        shapeKey = self._templateKey(queryStrings) if query_cache.enabled() else None
+        querySet = self._templateQuerySet(shapeKey, queryStrings)
+        if querySet is None:
+            querySet = self._interface.objectPrototype.objects(**queryStrings)
+            querySet = self._applyProjection(querySet)
+            querySet = self._applySort(querySet)
+            querySet = self._applyReadRouting(querySet)
+
+        if self._expression is not None:
+            querySet = querySet.filter(__raw__=self._expression.toQuery(self._interface.objectPrototype))
+        if paged:
+            querySet = self._applyPaging(querySet)
+        # last, mongoengine doesn't carry the batch size over when a queryset is cloned
+        return self._applyBatchSize(querySet, shapeKey)
+
+    def _templateKey(self, queryStrings):
+        """Everything the query template depends on besides the filter values"""
+        manager = mongorm.getManager()
+        return (
+            self._interface.name(),
+            tuple(sorted(queryStrings)),
+            tuple(self._sort),
+            bool(self._limit or self._pageAfter is not None),
+            tuple(self._onlyFields),
+            tuple(self._excludeFields),
+            read_policy.effectivePolicy(self._readPolicy),
+            id(manager),
+            manager.readAlias()
+        )
+
+    def _templateQuerySet(self, key, queryStrings):
+        """Fill the filter values into the cached template of shape key, None when it has no template"""
+        if key is None:
+            return None
+
+        template = query_cache.getTemplate(key)
+        if template is None:
+            document = self._interface.objectPrototype
+            querySet = self._applyReadRouting(self._applySort(self._applyProjection(document.objects())))
+            template = query_cache.QueryTemplate.create(querySet, document, queryStrings)
+            if template is None:
+                return None
+            query_cache.putTemplate(key, template)
+
+        return template.render(queryStrings)
+
+    def explain(self):
+        """Run the filter's query with execution stats and return its query_plan.QueryPlan"""
+        return query_plan.QueryPlan(self._buildQuerySet().explain())
+
+    def queryStrings(self):
+        """Return the filter strings with the deleted/archived omission compiled in"""
+        queryStrings = dict(self._filterStrings)
+        if self.getOmitDeleted():
+            queryStrings["deleted__ne"] = True
+        if self.getOmitArchived():
+            queryStrings["archived__ne"] = True
+        return queryStrings
+
+    def _applyReadRouting(self, querySet):
+        """Route the queryset according to the read policy"""
+        manager = mongorm.getManager()
+
+        policy = read_policy.effectivePolicy(self._readPolicy)
+        if policy == read_policy.BROWSE and manager.readAlias() == manager.READ_ALIAS:
+            return querySet.using(manager.READ_ALIAS)
+        return querySet.read_preference(read_policy.readPreference(policy))
+
+    def _applyBatchSize(self, querySet, shapeKey=None):
+        batchSize = self.cursorBatchSize(shapeKey)
+        if batchSize:
+            querySet = querySet.batch_size(batchSize)
+        return querySet
+
+    @staticmethod
+    def reapplyBatchSize(source, clone, batchSize=None):
+        """
+        Return clone with the batch size of the queryset it was cloned from, or batchSize if given.
+        mongoengine drops the batch size whenever a queryset is cloned (skip(), no_cache(), as_pymongo(), ..)
+        """
+        batchSize = batchSize or source._batch_size
+        if batchSize:
+            return clone.batch_size(batchSize)
+        return clone
+
+    def batchSize(self):
+        return self._batchSize
+
+    def setBatchSize(self, batchSize):
+        """Fix the cursor batch size of the filter's queries, None sizes them adaptively"""
+        self._batchSize = batchSize
+
+    def cursorBatchSize(self, shapeKey=None):
+        """
+        Return the cursor batch size of the filter's queries, None keeps the driver default, see batch_sizing.
+        Sizes are memoized per shapeKey (the query template key) and expected count when given
+        """
+        if self._batchSize:
+            return self._batchSize
+
+        expectedCount = self.expectedCount()
+        if shapeKey is None:
+            return self._chooseBatchSize(expectedCount)
+        return batch_sizing.memoize((shapeKey, expectedCount), lambda: self._chooseBatchSize(expectedCount))
+
+    def _chooseBatchSize(self, expectedCount):
+        manager = mongorm.getManager()
+        documentBytes = batch_sizing.estimateDocumentBytes(
+            self._interface.objectPrototype,
+            frozenset(self._interface.objectPrototype._fields) - self.deferredFields())
+        return batch_sizing.chooseBatchSize(expectedCount=expectedCount,
+                                            documentBytes=documentBytes,
+                                            latencyMs=batch_sizing.connectionLatencyMs(manager),
+                                            defaultBatchSize=manager.profile().batchSize())
+
+    def expectedCount(self):
+        """Return how many objects the filter's query should return at most, None if that isn't known"""
+        for field in ("_id", "uuid"):
+            if field in self._filterStrings:
+                return 1
+            if field + "__in" in self._filterStrings:
+                return len(self._filterStrings[field + "__in"])
+
+        counted = self._interface.cachedCount(self)
+        if self._limit:
+            return self._limit if counted is None else min(self._limit, counted)
+        return counted
+
+    def _fieldNames(self, fields):
+        """Map field db names to the interface's document attribute names, dropping foreign ones"""
+        nameMap = {field.db_name(): name for name, field in self._interface.objectPrototype._fields.items()}
+        return [nameMap[field] for field in fields if field in nameMap]
+
+    def _applyProjection(self, querySet):
+        if self._onlyFields:
+            return querySet.only(*self._fieldNames(list(self.REQUIRED_FIELDS) + self._onlyFields))
+        if self._excludeFields:
+            return querySet.exclude(*self._fieldNames(
+                [field for field in self._excludeFields if field not in self.REQUIRED_FIELDS]))
+        return querySet
+
+    def _sortKeys(self):
+        """
+        Return the (attribute name, db name, direction) sort keys the interface has, ending with
+        _id as a tie breaker whenever results are paged so every page boundary is unique
+        """
+        nameMap = {field.db_name(): name for name, field in self._interface.objectPrototype._fields.items()}
+        keys = [(nameMap[field], field, direction) for field, direction in self._sort if field in nameMap]
+        if (self._limit or self._pageAfter is not None) and "_id" not in [key[1] for key in keys]:
+            keys.append((nameMap["_id"], "_id", pymongo.ASCENDING))
+        return keys
+
+    def _applySort(self, querySet):
+        keys = ["{}{}".format("+" if direction == pymongo.ASCENDING else "-", name)
+                for name, field, direction in self._sortKeys()]
+        if keys:
+            return querySet.order_by(*keys)
+        return querySet
+
+    def _applyPaging(self, querySet):
+        if self._pageAfter is not None:
+            querySet = querySet.filter(__raw__=self._keysetQuery())
+        if self._limit:
+            querySet = querySet.limit(self._limit)
+        return querySet
+
+    def _keysetQuery(self):
+        """
+        Compile the page cursor into a range on the sort keys: documents after (k1, .., kn) are
+        those with k1 past v1, or k1 equal and k2 past v2, and so on down to the _id tie breaker.
+        Nulls (and missing fields) sort first, so they come after every value in a descending sort
+        """
+        keys = [(field, direction) for name, field, direction in self._sortKeys()]
+        missing = [field for field, direction in keys if field not in self._pageAfter]
+        if missing:
+            raise ValueError("Page cursor has no value for sort keys: {}".format(", ".join(missing)))
+
+        clauses = []
+        for index, (field, direction) in enumerate(keys):
+            value = self._pageAfter[field]
+            clause = {previous: self._pageAfter[previous] for previous, _ in keys[:index]}
+            if value is None:
+                # nulls sort first, nothing comes before them in a descending sort
+                if direction == pymongo.DESCENDING:
+                    continue
+                clause[field] = {"$ne": None}
+            elif direction == pymongo.ASCENDING:
+                clause[field] = {"$gt": value}
+            else:
+                clause[field] = {"$lt": value}
+                clauses.append(dict(clause, **{field: None}))
+            clauses.append(clause)
+
+        return {"$or": clauses}
+
+    def limit(self):
+        return self._limit
+
+    def setLimit(self, limit):
+        """Fetch at most limit objects per query, 0 for no limit"""
+        self._limit = int(limit or 0)
+
+    def pageAfter(self):
+        return self._pageAfter
+
+    def setPageAfter(self, cursor):
+        """
+        Start results after cursor, the last object of the previous page or a dict of its
+        {db name: value} for every sort key and _id. None goes back to the first page.
+
+        Pages are read through a range on the sort keys rather than a skip, so fetching a page
+        costs the same at any depth.
+        """
+        if cursor is None or isinstance(cursor, dict):
+            self._pageAfter = cursor
+            return
+
+        prototype = self._interface.objectPrototype
+        pageAfter = {}
+        for name, field, direction in self._sortKeys() or [(None, "_id", pymongo.ASCENDING)]:
+            value = cursor.get(field)
+            if value is not None:
+                value = prototype._fields[prototype._reverse_db_field_map[field]].to_mongo(value)
+            pageAfter[field] = value
+        if "_id" not in pageAfter:
+            pageAfter["_id"] = cursor.get("_id")
+        self._pageAfter = pageAfter
+
+    def only(self, *fields):
+        """Load only these fields (plus REQUIRED_FIELDS), names the interface doesn't have are ignored"""
+        self._onlyFields = list(fields)
+        self._excludeFields = []
+
+    def exclude(self, *fields):
+        """Load every field except these"""
+        self._excludeFields = list(fields)
+        self._onlyFields = []
+
+    def resetProjection(self):
+        self._onlyFields = []
+        self._excludeFields = []
+
+    def projection(self):
+        """Return the (only, exclude) field lists, at most one of them is non-empty"""
+        return list(self._onlyFields), list(self._excludeFields)
+
+    def deferredFields(self):
+        """Return the document attribute names the projection leaves out"""
+        allFields = self._interface.objectPrototype._fields.keys()
+        if self._onlyFields:
+            loaded = set(self._fieldNames(list(self.REQUIRED_FIELDS) + self._onlyFields))
+            return frozenset(name for name in allFields if name not in loaded)
+        if self._excludeFields:
+            return frozenset(self._fieldNames(
+                [field for field in self._excludeFields if field not in self.REQUIRED_FIELDS]))
+        return frozenset()
+
+    def projectionDocument(self):
+        """Return the projection as a Mongo projection document on db names, None when whole documents load"""
+        dbNames = [field.db_name() for field in self._interface.objectPrototype._fields.values()]
+        if self._onlyFields:
+            return {field: 1 for field in list(self.REQUIRED_FIELDS) + self._onlyFields if field in dbNames}
+        excluded = [field for field in self._excludeFields if field in dbNames and field not in self.REQUIRED_FIELDS]
+        if excluded:
+            return {field: 0 for field in excluded}
+        return None
+
+    def count(self, refresh=False):
+        """Return the number of documents matching the filter, counted on the server"""
+        return self._interface.count(self, refresh=refresh)
+
+    def countDocuments(self):
+        """
+        Count the matching documents with the same compiled predicate and routing as querySet(),
+        using the collection metadata estimate when the predicate is empty
+        """
+        querySet = self.querySet(paged=False)
+        collection = querySet._collection
+        if querySet._read_preference is not None:
+            collection = collection.with_options(read_preference=querySet._read_preference)
+
+        query = querySet._query
+        if not hasattr(collection, "count_documents"):
+            # pymongo < 3.7
+            return collection.count(query)
+        if not query:
+            return collection.estimated_document_count()
+        return collection.count_documents(query)
+
+    def filterKey(self):
+        """Return a hashable key identifying the predicate this filter compiles to"""
+        interfaceName = self._interface.name() if self._interface else None
+        expression = None
+        if self._expression is not None and self._interface:
+            expression = repr(self._expression.toQuery(self._interface.objectPrototype))
+        return interfaceName, repr(sorted(self.queryStrings().items())), expression
+
+    def queryKey(self):
+        """
+        Return a hashable key identifying the whole query, filters with equal keys fetch the same results.
+        Includes where the read is routed, so a read inside primaryReads() never shares a browse read.
+        """
+        manager = mongorm.getManager()
+        pageAfter = repr(sorted(self._pageAfter.items())) if self._pageAfter is not None else None
+        return (self.filterKey(), tuple(self._sort), self._limit, pageAfter, repr(self.projection()),
+                read_policy.effectivePolicy(self._readPolicy), id(manager), manager.readAlias())
+
+    def clone(self):
+        """Return an independent copy of this filter"""
+        other = copy.copy(self)
+        other._filterStrings = dict(self._filterStrings)
+        other._onlyFields = list(self._onlyFields)
+        other._excludeFields = list(self._excludeFields)
+        other._pageAfter = dict(self._pageAfter) if self._pageAfter is not None else None
+        other._querySet = None
+        other._objects = []
+        return other
 
     def filterStrings(self):
         return self._filterStrings
@@ -29,6 +367,19 @@ class DataFilter(object):
     def overrideFilterStrings(self, filterStrings):
         self._filterStrings = filterStrings
 
+    def where(self, expression):
+        """AND a filter_expression.FilterExpression into the filter"""
+        if self._expression is None:
+            self._expression = expression
+        else:
+            self._expression = self._expression & expression
+
+    def expression(self):
+        return self._expression
+
+    def clearWhere(self):
+        self._expression = None
+
     def interface(self):
         return self._interface
 
@@ -41,6 +392,7 @@ class DataFilter(object):
         if not self.interface() or not self.interface().name() == datainterface.name():
             self.setInterface(datainterface)
             self._filterStrings = {}
+            self._expression = None
 
         for k, v in kwargs.items():
             self._filterStrings[k] = v
@@ -48,16 +400,11 @@ class DataFilter(object):
         return True
 
     def objects(self):
-        self._objects = []
-
-        for object in self.querySet():
-            if object.get("deleted") and self.getOmitDeleted():
-                continue
-            elif object.get("archived") and self.getOmitArchived():
-                continue
-
-            self._objects.append(object)
-
+        self._objects = list(self.querySet())
+        deferredFields = self.deferredFields()
+        if deferredFields:
+            for object in self._objects:
+                object._deferred_fields = deferredFields
         return self._objects
 
     def getOmitDeleted(self):
@@ -72,8 +419,54 @@ class DataFilter(object):
     def omitArchived(self, value):
         self._omitArchived = bool(value)
 
-    def sort(self, sort):
-        return None
+    def readPolicy(self):
+        return self._readPolicy
+
+    def setReadPolicy(self, policy):
+        """Set where this filter's reads go, read_policy.BROWSE (default) or read_policy.PRIMARY"""
+        self._readPolicy = policy
+
+    def sort(self, *keys):
+        """
+        Append sort keys, applied in order on the server. A key is a (db name, direction) pair
+        such as field.asc() / field.desc(), or a db name string with an optional +/- prefix.
+        Keys on fields the interface doesn't have are ignored by the query.
+        """
+        sort = list(self._sort)
+        for key in keys:
+            if isinstance(key, tuple):
+                field, direction = key
+            elif key.startswith("-"):
+                field, direction = key[1:], pymongo.DESCENDING
+            else:
+                field, direction = key.lstrip("+"), pymongo.ASCENDING
+            if direction not in (pymongo.ASCENDING, pymongo.DESCENDING):
+                raise ValueError("Invalid sort direction ({}) for field: {}".format(direction, field))
+            sort = [item for item in sort if item[0] != field]
+            sort.append((field, direction))
+        self._sort = tuple(sort)
 
     def getSort(self):
-        return None
+        """Return the sort spec as a tuple of (db name, direction) pairs"""
+        return self._sort
+
+    def resetSort(self):
+        self._sort = ()
+
+    def __eq__(self, other):
+        if not isinstance(other, DataFilter):
+            return NotImplemented
+        return (self.filterKey() == other.filterKey() and
+                self._sort == other._sort and
+                self._limit == other._limit and
+                self._pageAfter == other._pageAfter and
+                self.projection() == other.projection() and
+                self._readPolicy == other._readPolicy)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    __hash__ = None
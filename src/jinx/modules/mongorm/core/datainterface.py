@@ -1,7 +1,26 @@
 from mongorm import interfaces
-from mongorm.core.datacontainer import DataContainer
+from mongorm.core.datacontainer import DataContainer, LazyDataContainer
+from mongorm.core.datafilter import DataFilter
+from mongorm.core.dataobject import RawJinxObject
+from mongorm.core import single_flight
+from mongorm.base import read_policy
 from mongoengine.errors import MultipleObjectsReturned
+from bson.son import SON
+from uuid import UUID
+import collections
+import mongorm
 import re
+import threading
+import time
+import logging
+
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds a cached total stays valid, counts drift as other users publish
+COUNT_CACHE_TTL = 30
+# Seconds an object cached by get() stays valid, other processes may write to it
+OBJECT_CACHE_TTL = 30
 
 
 DATA_OBJECT_MAP = {
@@ -13,6 +32,12 @@ DATA_OBJECT_MAP = {
     'seed': interfaces.Seed
 }
 
+# Child interface of each interface and the child field holding its parent's _id, for fetchSubtree()
+SUBTREE_LINKS = {
+    'twig': ('stalk', 'twig_uuid'),
+    'stalk': ('leaf', 'stalk_uuid')
+}
+
 
 class DataInterface(object):
     """
@@ -23,6 +48,10 @@ class DataInterface(object):
         self._object_prototype = DATA_OBJECT_MAP[db_name]
         self._name = db_name.replace(db_name[0], db_name[0].upper())
         self._cacheSizeLimit = 100000
+        self._countCache = {}
+        self._countLock = threading.Lock()
+        self._objectCache = collections.OrderedDict()
+        self._objectLock = threading.Lock()
 
     def __repr__(self):
         reprstring = object.__repr__(self)
@@ -34,15 +63,55 @@ class DataInterface(object):
     def __getitem__(self, item):
         return self.getField(item)
 
-    def all(self, dataFilter):
-        """Return all objects from filter"""
-        datacontainer = DataContainer(self, querySet=dataFilter.querySet())
+    def all(self, dataFilter, raw=False):
+        """
+        Return all objects from filter, as read-only RawJinxObject records if raw.
+        Threads asking for the same query at once share one round trip and the same objects,
+        each gets its own container.
+        """
+        key = (self._db_name, dataFilter.queryKey(), raw)
+        datacontainer, shared = single_flight.getGroup().do(key, lambda: self._all(dataFilter, raw))
+        return datacontainer.copy() if shared else datacontainer
+
+    def _all(self, dataFilter, raw):
+        querySet = dataFilter.querySet()
+        datacontainer = DataContainer(self, querySet=querySet,
+                                      deferredFields=None if raw else dataFilter.deferredFields(),
+                                      serverSorted=bool(querySet._ordering),
+                                      raw=raw)
         return datacontainer
 
-    def one(self, dataFilter):
+    def all_lazy(self, dataFilter, batch_size=None):
+        """Return a container over the filter's results that only fetches what is asked of it"""
+        return LazyDataContainer(self, dataFilter, batchSize=batch_size)
+
+    def iter(self, dataFilter, batch_size=None, raw=False):
+        """
+        Yield the objects matching the filter as the cursor delivers them, batch_size documents
+        per round trip. Nothing is kept, so memory stays flat however large the result is.
+        """
+        if raw:
+            for document in self._streamQuerySet(dataFilter, batch_size, raw=True):
+                yield RawJinxObject(self, document)
+            return
+
+        deferredFields = dataFilter.deferredFields()
+        for object in self._streamQuerySet(dataFilter, batch_size):
+            if deferredFields:
+                object._deferred_fields = deferredFields
+            yield object
+
+    def _streamQuerySet(self, dataFilter, batch_size=None, raw=False):
+        source = dataFilter.querySet()
+        querySet = source.no_cache()
+        if raw:
+            querySet = querySet.as_pymongo()
+        return DataFilter.reapplyBatchSize(source, querySet, batch_size)
+
+    def one(self, dataFilter, raw=False):
         """Implied that there is only one result. Will return that object."""
 
-        objects = self.all(dataFilter)
+        objects = self.all(dataFilter, raw=raw)
 
         try:
             assert len(objects) == 1
@@ -51,6 +120,129 @@ class DataInterface(object):
 
         return objects[0]
 
+    def fetchSubtree(self, dataFilter):
+        """
+        Fetch the objects matching dataFilter with all their descendants (twig > stalk > leaf) in one
+        aggregation round trip. children() of every returned object answers from what was fetched
+        instead of querying. The filter's projection and deleted/archived omission apply on every level.
+
+        Each object comes back with its whole subtree in a single document, which has to stay
+        under Mongo's 16MB document limit.
+        """
+        db = mongorm.getHandler()
+        levels = []
+        interfaceName = self._db_name
+        while interfaceName in SUBTREE_LINKS:
+            interfaceName, linkField = SUBTREE_LINKS[interfaceName]
+            levels.append((db[interfaceName], linkField))
+        if not levels:
+            raise ValueError("DataInterface ({}) has no children to fetch".format(self.name()))
+
+        querySet = dataFilter.querySet()
+        pipeline = [{"$match": querySet._query}]
+        if querySet._ordering:
+            pipeline.append({"$sort": SON(querySet._ordering)})
+        if querySet._limit:
+            pipeline.append({"$limit": querySet._limit})
+
+        omit = []
+        if dataFilter.getOmitDeleted():
+            omit.append({"$ne": ["$$child.deleted", True]})
+        if dataFilter.getOmitArchived():
+            omit.append({"$ne": ["$$child.archived", True]})
+        omit = omit[0] if len(omit) == 1 else {"$and": omit} if omit else None
+
+        projection = dataFilter.projectionDocument() or {}
+        childFilters = []
+        localField = "_id"
+        for depth, (interface, linkField) in enumerate(levels):
+            alias = "_subtree{}".format(depth)
+            pipeline.append({"$lookup": {
+                "from": interface.objectPrototype._get_collection_name(),
+                "localField": localField,
+                "foreignField": linkField,
+                "as": alias
+            }})
+            # dropped children take their own children with them, the next lookup only follows the rest
+            if omit:
+                pipeline.append({"$addFields": {
+                    alias: {"$filter": {"input": "$" + alias, "as": "child", "cond": omit}}
+                }})
+            localField = alias + "._id"
+
+            childFilter = mongorm.getFilter()
+            childFilter.setInterface(interface)
+            only, exclude = dataFilter.projection()
+            if only:
+                childFilter.only(*(only + [linkField]))
+            elif exclude:
+                childFilter.exclude(*[field for field in exclude if field != linkField])
+            childFilters.append(childFilter)
+            for field, value in (childFilter.projectionDocument() or {}).items():
+                projection["{}.{}".format(alias, field)] = value
+
+        if projection:
+            pipeline.append({"$project": projection})
+
+        collection = querySet._collection
+        if querySet._read_preference is not None:
+            collection = collection.with_options(read_preference=querySet._read_preference)
+
+        deferredFields = dataFilter.deferredFields()
+        datacontainer = DataContainer(self)
+        for document in collection.aggregate(pipeline):
+            subtrees = [document.pop("_subtree{}".format(depth), []) for depth in range(len(levels))]
+            object = self._objectFromSon(document, deferredFields)
+            datacontainer.append_object(object)
+
+            parents = [object]
+            for (interface, linkField), childFilter, documents in zip(levels, childFilters, subtrees):
+                childDeferredFields = childFilter.deferredFields()
+                childrenByParent = {}
+                for childDocument in documents:
+                    child = interface._objectFromSon(childDocument, childDeferredFields)
+                    childrenByParent.setdefault(str(childDocument.get(linkField)), []).append(child)
+
+                children = []
+                for parent in parents:
+                    container = DataContainer(interface)
+                    for child in childrenByParent.get(str(parent._id), []):
+                        container.append_object(child)
+                    container.sort("label")
+                    parent.setPrefetchedChildren(container)
+                    children.extend(container)
+                parents = children
+
+        if not querySet._ordering:
+            datacontainer.sort("label")
+        return datacontainer
+
+    def _objectFromSon(self, document, deferredFields):
+        object = self.objectPrototype._from_son(document)
+        if deferredFields:
+            object._deferred_fields = deferredFields
+        return object
+
+    def all_async(self, dataFilter):
+        """Awaitable version of all()"""
+        from mongorm.core import asyncfacade
+        return asyncfacade.runAsync(self.all, dataFilter)
+
+    def one_async(self, dataFilter):
+        """Awaitable version of one()"""
+        from mongorm.core import asyncfacade
+        return asyncfacade.runAsync(self.one, dataFilter)
+
+    def count_async(self, dataFilter):
+        """Awaitable version of count()"""
+        from mongorm.core import asyncfacade
+        return asyncfacade.runAsync(self.count, dataFilter)
+
+    def iter_async(self, dataFilter, batch_size=100):
+        """Return an async iterator over the objects matching the filter"""
+        from mongorm.core import asyncfacade
+        return asyncfacade.AsyncResultIterator(self._streamQuerySet(dataFilter, batch_size), batchSize=batch_size)
+
     @property
     def objectPrototype(self):
         return self._object_prototype
@@ -61,15 +253,97 @@ class DataInterface(object):
 
     def clearDataCache(self):
         """Clear data cache"""
-        return
+        with self._countLock:
+            self._countCache.clear()
+        with self._objectLock:
+            self._objectCache.clear()
+
+    def count(self, dataFilter=None, refresh=False):
+        """Get count of the objects of this DataInterface type matching the filter, all objects if no filter"""
+        if dataFilter is None:
+            dataFilter = mongorm.getFilter()
+            dataFilter.search(self)
+
+        key = dataFilter.filterKey()
+        if not refresh:
+            cached = self.cachedCount(dataFilter)
+            if cached is not None:
+                return cached
 
-    def count(self, dataFilter):
-        """Get count of all objects of this DataInterface type"""
-        return len(self.all())
+        total = dataFilter.countDocuments()
+        with self._countLock:
+            self._countCache[key] = (total, time.time())
+        return total
+
+    def cachedCount(self, dataFilter):
+        """Return the cached total for the filter, None if it was not counted recently"""
+        if not self._countCache:
+            return None
+        with self._countLock:
+            entry = self._countCache.get(dataFilter.filterKey())
+        if entry is None or time.time() - entry[1] > COUNT_CACHE_TTL:
+            return None
+        return entry[0]
+
+    def countInBackground(self, dataFilter, callback):
+        """
+        Count the filter on a worker thread and call callback(total) from that thread when done.
+        Returns the started thread.
+        """
+        dataFilter = dataFilter.clone()
+
+        def run():
+            try:
+                total = self.count(dataFilter)
+            except Exception:
+                _LOGGER.exception("Background count of {} failed".format(self.name()))
+                return
+            callback(total)
+
+        thread = threading.Thread(target=run, name="mongorm-count-{}".format(self._db_name))
+        thread.daemon = True
+        thread.start()
+        return thread
 
     def get(self, uuid):
-        """Get Data object that matches uuid value of this DataInterface type"""
-        return
+        """
+        Get Data object that matches uuid value of this DataInterface type, None if there is none or
+        uuid isn't a valid uuid.
+        Records are kept for OBJECT_CACHE_TTL seconds in a least recently used cache of up to
+        cacheSizeLimit() records, each call gets its own object. Reads inside read_policy.primaryReads()
+        skip the cache, saving or deleting an object drops it and clearDataCache() empties it.
+        """
+        try:
+            key = str(UUID(str(uuid)))
+        except ValueError:
+            return None
+
+        # primaryReads() forces the primary policy on browse reads
+        if read_policy.effectivePolicy(read_policy.BROWSE) != read_policy.PRIMARY:
+            with self._objectLock:
+                entry = self._objectCache.pop(key, None)
+                if entry is not None and time.time() - entry[1] <= OBJECT_CACHE_TTL:
+                    self._objectCache[key] = entry
+                    return entry[0].document()
+
+        # _id holds the uuid as a UUID and is always indexed
+        filt = mongorm.getFilter()
+        filt.search(self, _id=UUID(key))
+        records = self.all(filt, raw=True)
+        if not records.hasObjects():
+            return None
+
+        record = records[0]
+        with self._objectLock:
+            self._objectCache[key] = (record, time.time())
+            while len(self._objectCache) > self.cacheSizeLimit():
+                self._objectCache.popitem(last=False)
+        return record.document()
+
+    def forget(self, uuid):
+        """Drop the object with uuid from the get() cache"""
+        with self._objectLock:
+            self._objectCache.pop(str(uuid), None)
 
     def name(self):
         return self._name
@@ -11,6 +11,9 @@ class BaseJinxObject(object):
 
     INTERFACE_STRING = ""
 
+    # children filled in by DataInterface.fetchSubtree(), None when they have to be queried
+    _prefetchedChildren = None
+
     _id = mongoengine.UUIDField(required=True, primary_key=True, visible=False, dispName="_ID")
     uuid = mongoengine.StringField(required=True, dispName="UUID", visible=True, icon=icon_paths.ICON_FINGERPRINT_SML)
     path = mongoengine.StringField(required=True, dispName="Path", icon=icon_paths.ICON_LOCATION_SML)
@@ -39,7 +42,10 @@ class BaseJinxObject(object):
         return "{} object [{}]".format(self.interfaceName(), self.label)
 
     def get(self, item):
-        return self.getDataDict().get(item)
+        name = self._reverse_db_field_map.get(item)
+        if name is None:
+            return None
+        return getattr(self, name)
 
     def _generate_id(self):
         """
@@ -52,6 +58,12 @@ class BaseJinxObject(object):
 
     @classmethod
     def dataInterface(cls):
+        """The shared handler's interface, the one whose get() cache save() and delete() invalidate"""
+        import mongorm
+        handler = mongorm.getHandler()
+        if handler.hasInterface(cls.INTERFACE_STRING):
+            return handler[cls.INTERFACE_STRING]
+        # the collection doesn't exist on the server yet
         from mongorm.core.datainterface import DataInterface
         return DataInterface(cls.INTERFACE_STRING)
 
@@ -68,12 +80,33 @@ class BaseJinxObject(object):
     def getDataDict(self):
         return {k: v for k, v in [(field.db_name(), self[field.db_name()]) for field in self.getFields()]}
 
+    def save(self, *args, **kwargs):
+        result = super(BaseJinxObject, self).save(*args, **kwargs)
+        self._forgetCached()
+        return result
+
+    def delete(self, *args, **kwargs):
+        super(BaseJinxObject, self).delete(*args, **kwargs)
+        self._forgetCached()
+
+    def _forgetCached(self):
+        # DataInterface.get() would keep serving the object as it was before the write
+        import mongorm
+        mongorm.getHandler().forgetObject(self.INTERFACE_STRING, self.uuid)
+
     def getUuid(self):
         return self.uuid
 
     def getDataType(self, field):
         return self.getField(field).dataType()
 
+    def setPrefetchedChildren(self, children):
+        """Answer children() from the DataContainer children, None queries them again"""
+        self._prefetchedChildren = children
+
+    def prefetchedChildren(self):
+        return self._prefetchedChildren
+
     def children(self, *args, **kwargs):
         # Reimplement - the other interface children in sub-class
         interface = self.interfaceName()
@@ -101,6 +134,71 @@ class BaseJinxObject(object):
     def siblings(self):
         raise NotImplementedError
 
+    def children_async(self, *args, **kwargs):
+        """Awaitable version of children()"""
+        from mongorm.core import asyncfacade
+        return asyncfacade.runAsync(self.children, *args, **kwargs)
+
+    def parent_async(self, *args, **kwargs):
+        """Awaitable version of parent()"""
+        from mongorm.core import asyncfacade
+        return asyncfacade.runAsync(self.parent, *args, **kwargs)
+
+    def siblings_async(self, *args, **kwargs):
+        """Awaitable version of siblings()"""
+        from mongorm.core import asyncfacade
+        return asyncfacade.runAsync(self.siblings, *args, **kwargs)
+
     def pprint(self):
         import pprint
-        pprint.pprint(self.getDataDict())
\ No newline at end of file
+        pprint.pprint(self.getDataDict())
+
+
+class RawJinxObject(object):
+    """
+    Read-only record built straight from a raw pymongo document, for browsing without the cost of
+    Document hydration. Offers the read side of BaseJinxObject keyed by db field names; relationships
+    and saving go through document().
+    """
+
+    __slots__ = ("_interface", "_data")
+
+    def __init__(self, interface, data):
+        self._interface = interface
+        self._data = data
+
+    def __repr__(self):
+        return "<RawJinxObject [{}] ({})>".format(self.get("label"), self.interfaceName())
+
+    def __str__(self):
+        return "{} raw object [{}]".format(self.interfaceName(), self.get("label"))
+
+    def dataInterface(self):
+        return self._interface
+
+    def interfaceName(self):
+        return self._interface.name()
+
+    def get(self, item):
+        if item in self._data:
+            return self._data[item]
+        # fill in what a Document would have defaulted
+        name = self._interface.objectPrototype._reverse_db_field_map.get(item)
+        if name is None:
+            return None
+        default = self._interface.objectPrototype._fields[name].default
+        return default() if callable(default) else default
+
+    def getUuid(self):
+        return self.get("uuid")
+
+    def getDataType(self, field):
+        return self._interface.getField(field).dataType()
+
+    def getDataDict(self):
+        return {field.db_name(): self.get(field.db_name()) for field in self._interface.getFields()}
+
+    def document(self):
+        """Return the full BaseJinxObject for this record"""
+        return self._interface.objectPrototype._from_son(dict(self._data))
+
@@ -0,0 +1,273 @@
+"""
+Filter expressions compiled to native Mongo queries.
+
+Build conditions from field references and combine them with &, | and ~:
+
+    expression = (field("version").gte(3) & field("label").startswith("comp_")) | ~field("tags").exists()
+    filt.where(expression)
+
+Prefix matches compile to an anchored, case-sensitive regex so they can use an index. Values are
+converted the way the field stores them, so strings work for dates, numbers and UUIDs.
+parseSearchText() builds an expression from search bar text.
+"""
+import re
+import shlex
+
+from bson.regex import Regex
+
+EQ = "eq"
+NE = "ne"
+IN = "in"
+NIN = "nin"
+GT = "gt"
+GTE = "gte"
+LT = "lt"
+LTE = "lte"
+STARTSWITH = "startswith"
+EXISTS = "exists"
+
+# operators with a direct inverse, the rest negate with $not
+_INVERSE = {
+    EQ: NE,
+    NE: EQ,
+    IN: NIN,
+    NIN: IN,
+}
+
+
+class FilterExpression(object):
+
+    def __and__(self, other):
+        return And(self, other)
+
+    def __or__(self, other):
+        return Or(self, other)
+
+    def __invert__(self):
+        return self.negated()
+
+    def negated(self):
+        raise NotImplementedError
+
+    def toQuery(self, document):
+        """Compile to a Mongo query dict for the Document class document"""
+        raise NotImplementedError
+
+    def validate(self, document):
+        """Raise ValueError if the expression uses fields the Document class document doesn't have or values they can't hold"""
+        self.toQuery(document)
+
+
+class Condition(FilterExpression):
+    def __init__(self, fieldName, operator, value=None, negate=False):
+        self._fieldName = fieldName
+        self._operator = operator
+        self._value = value
+        self._negate = negate
+
+    def __repr__(self):
+        return "Condition({}, {}, {!r}{})".format(self._fieldName, self._operator, self._value,
+                                                 ", negate=True" if self._negate else "")
+
+    def negated(self):
+        if self._operator in _INVERSE and not self._negate:
+            return Condition(self._fieldName, _INVERSE[self._operator], self._value)
+        if self._operator == EXISTS:
+            return Condition(self._fieldName, EXISTS, not self._value)
+        return Condition(self._fieldName, self._operator, self._value, negate=not self._negate)
+
+    def _field(self, document):
+        name = document._reverse_db_field_map.get(self._fieldName)
+        if name is None:
+            raise ValueError("Invalid field [{}] for data type: {}".format(self._fieldName, document.__name__))
+        return document._fields[name]
+
+    def _convert(self, field, value):
+        if value is None:
+            return None
+        try:
+            converted = field.prepare_query_value(None, value)
+        except (TypeError, ValueError):
+            converted = None
+        # unparsable dates convert to None rather than raising
+        if converted is None:
+            raise ValueError("Invalid value [{}] for field: {}".format(value, self._fieldName))
+        return converted
+
+    def toQuery(self, document):
+        field = self._field(document)
+
+        if self._operator == EQ:
+            condition = self._convert(field, self._value)
+        elif self._operator == NE:
+            condition = {"$ne": self._convert(field, self._value)}
+        elif self._operator in (IN, NIN):
+            condition = {"$" + self._operator: [self._convert(field, value) for value in self._value]}
+        elif self._operator in (GT, GTE, LT, LTE):
+            condition = {"$" + self._operator: self._convert(field, self._value)}
+        elif self._operator == STARTSWITH:
+            condition = {"$regex": "^" + re.escape(self._value)}
+        elif self._operator == EXISTS:
+            condition = {"$exists": bool(self._value)}
+        else:
+            raise ValueError("Invalid filter operator: {}".format(self._operator))
+
+        if self._negate:
+            if self._operator == STARTSWITH:
+                # $not takes a regex object rather than an operator expression
+                condition = {"$not": Regex(condition["$regex"])}
+            else:
+                condition = {"$not": condition}
+
+        return {field.db_name(): condition}
+
+
+class And(FilterExpression):
+    def __init__(self, *expressions):
+        self._expressions = expressions
+
+    def __repr__(self):
+        return "And{!r}".format(self._expressions)
+
+    def negated(self):
+        return Or(*[expression.negated() for expression in self._expressions])
+
+    def toQuery(self, document):
+        queries = [expression.toQuery(document) for expression in self._expressions]
+        merged = {}
+        for query in queries:
+            for key, condition in query.items():
+                if key not in merged:
+                    merged[key] = condition
+                elif _isOperatorDict(merged[key]) and _isOperatorDict(condition) and \
+                        not set(merged[key]) & set(condition):
+                    # conditions on the same field become one range, e.g. {"$gte": 2, "$lte": 4}
+                    merged[key] = dict(merged[key], **condition)
+                else:
+                    return {"$and": queries}
+        return merged
+
+
+def _isOperatorDict(condition):
+    return isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition)
+
+
+class Or(FilterExpression):
+    def __init__(self, *expressions):
+        self._expressions = expressions
+
+    def __repr__(self):
+        return "Or{!r}".format(self._expressions)
+
+    def negated(self):
+        return And(*[expression.negated() for expression in self._expressions])
+
+    def toQuery(self, document):
+        return {"$or": [expression.toQuery(document) for expression in self._expressions]}
+
+
+class FieldReference(object):
+    """Builds the conditions of one field, by db name"""
+
+    def __init__(self, fieldName):
+        self._fieldName = fieldName
+
+    def eq(self, value):
+        return Condition(self._fieldName, EQ, value)
+
+    def ne(self, value):
+        return Condition(self._fieldName, NE, value)
+
+    def isIn(self, values):
+        return Condition(self._fieldName, IN, list(values))
+
+    def notIn(self, values):
+        return Condition(self._fieldName, NIN, list(values))
+
+    def gt(self, value):
+        return Condition(self._fieldName, GT, value)
+
+    def gte(self, value):
+        return Condition(self._fieldName, GTE, value)
+
+    def lt(self, value):
+        return Condition(self._fieldName, LT, value)
+
+    def lte(self, value):
+        return Condition(self._fieldName, LTE, value)
+
+    def between(self, low, high):
+        """Inclusive range, either end may be None to leave it open"""
+        conditions = []
+        if low is not None:
+            conditions.append(self.gte(low))
+        if high is not None:
+            conditions.append(self.lte(high))
+        return And(*conditions)
+
+    def startswith(self, prefix):
+        return Condition(self._fieldName, STARTSWITH, prefix)
+
+    def exists(self, exists=True):
+        return Condition(self._fieldName, EXISTS, exists)
+
+
+def field(fieldName):
+    return FieldReference(fieldName)
+
+
+# "-field>=value", the leading dash negates
+_TERM = re.compile(r"^(?P<negate>-)?(?P<field>[A-Za-z_][A-Za-z0-9_]*)(?P<op>>=|<=|!=|>|<|:|=)(?P<value>.*)$")
+
+
+def parseSearchText(text, defaultField="label"):
+    """
+    Parse search bar text into an expression, terms are ANDed:
+
+        comp_           label starts with comp_
+        label:comp_*    label starts with comp_
+        status:Approved,Declined
+        version>=3 created<2020-06-01
+        -status:Declined
+        has:thumbnail   -has:thumbnail
+
+    Returns None for empty text. Raises ValueError on malformed terms.
+    """
+    try:
+        terms = shlex.split(text or "")
+    except ValueError as e:
+        raise ValueError("Invalid search text: {}".format(e))
+
+    expressions = []
+    for term in terms:
+        negate = term.startswith("-")
+        match = _TERM.match(term)
+        if match is None:
+            expression = field(defaultField).startswith(term[1:] if negate else term)
+        else:
+            name, op, value = match.group("field"), match.group("op"), match.group("value")
+            if not value:
+                raise ValueError("Missing value in search term: {}".format(term))
+
+            if name == "has" and op == ":":
+                expression = field(value).exists()
+            elif op in (":", "="):
+                if "," in value:
+                    expression = field(name).isIn([item for item in value.split(",") if item])
+                elif value.endswith("*"):
+                    expression = field(name).startswith(value[:-1])
+                else:
+                    expression = field(name).eq(value)
+            elif op == "!=":
+                expression = field(name).ne(value)
+            else:
+                expression = {">": field(name).gt, ">=": field(name).gte,
+                              "<": field(name).lt, "<=": field(name).lte}[op](value)
+
+        expressions.append(expression.negated() if negate else expression)
+
+    if not expressions:
+        return None
+    if len(expressions) == 1:
+        return expressions[0]
+    return And(*expressions)
@@ -0,0 +1,127 @@
+"""
+Compiled query templates.
+
+Relationship lookups like Twig.children() run the same query shape, {twig_uuid: X}, thousands of
+times per refresh. A QueryTemplate is built once per shape: the queryset with projection, sort and
+connection settings applied, plus for every filter string where its value goes in the Mongo query
+and which field converts it. Later queries of the shape clone the template and fill in their values
+instead of rebuilding the queryset and translating the filter strings again.
+
+Only plain field names with simple operators (field, field__ne, field__in, ...) are templated, other
+filter strings take the regular path.
+"""
+import collections
+import threading
+
+from mongoengine.queryset.visitor import Q
+
+# Operators a template can fill in, anything else is translated by mongoengine per query
+SIMPLE_OPERATORS = ("ne", "lt", "lte", "gt", "gte", "in", "nin", "exists")
+
+MAX_TEMPLATES = 512
+
+
+class QueryTemplate(object):
+    def __init__(self, querySet, slots):
+        self._querySetClass = querySet.__class__
+        self._state = dict(querySet.__dict__)
+        self._slots = slots
+
+    @classmethod
+    def create(cls, querySet, document, keys):
+        """Return a template for the filter string keys, None if any of them can't be templated"""
+        slots = []
+        operatorsByField = {}
+        for key in sorted(keys):
+            parts = key.split("__")
+            if len(parts) > 2 or (len(parts) == 2 and parts[1] not in SIMPLE_OPERATORS):
+                return None
+            field = document._fields.get(parts[0])
+            if field is None:
+                return None
+            op = parts[1] if len(parts) == 2 else None
+
+            # an equality can't share its field with another condition without an $and
+            operators = operatorsByField.setdefault(field.db_field, set())
+            if None in operators or (op is None and operators) or op in operators:
+                return None
+            operators.add(op)
+
+            slots.append((key, field.db_field, op, field))
+
+        return cls(querySet, slots)
+
+    def render(self, queryStrings):
+        """Return a new queryset of the template's shape querying queryStrings' values"""
+        query = {}
+        for key, dbName, op, field in self._slots:
+            value = queryStrings[key]
+            if op is None:
+                query[dbName] = field.prepare_query_value(op, value)
+                continue
+
+            if op in ("in", "nin"):
+                value = [field.prepare_query_value(op, item) for item in value]
+            elif op == "exists":
+                value = bool(value)
+            else:
+                value = field.prepare_query_value(op, value)
+            query.setdefault(dbName, {})["$" + op] = value
+
+        # QuerySet.clone() copies every attribute one by one, most of the cost of a query, the template's
+        # state is never modified so the new queryset can share it. Filtering it further clones as usual.
+        querySet = self._querySetClass.__new__(self._querySetClass)
+        querySet.__dict__.update(self._state)
+        querySet._query_obj = Q(__raw__=query)
+        # what QuerySet._query would compile the Q object to
+        if querySet._class_check and querySet._initial_query:
+            query = dict(query, **querySet._initial_query)
+        querySet._mongo_query = query
+        return querySet
+
+
+_LOCK = threading.Lock()
+_TEMPLATES = collections.OrderedDict()
+_ENABLED = True
+
+
+def enabled():
+    return _ENABLED
+
+
+def setEnabled(enabled):
+    global _ENABLED
+    _ENABLED = bool(enabled)
+    clear()
+
+
+def getTemplate(key):
+    with _LOCK:
+        template = _TEMPLATES.pop(key, None)
+        if template is not None:
+            _TEMPLATES[key] = template
+        return template
+
+
+def putTemplate(key, template):
+    with _LOCK:
+        _TEMPLATES[key] = template
+        while len(_TEMPLATES) > MAX_TEMPLATES:
+            _TEMPLATES.popitem(last=False)
+
+
+def clear():
+    """Drop every template, they hold collections of the current connection"""
+    with _LOCK:
+        _TEMPLATES.clear()
+
+
+def size():
+    return len(_TEMPLATES)
+
+
+def resetAfterFork():
+    """Replace the lock and the templates in a forked child, a parent thread may have held the lock while forking"""
+    global _LOCK, _TEMPLATES
+    _LOCK = threading.Lock()
+    _TEMPLATES = collections.OrderedDict()
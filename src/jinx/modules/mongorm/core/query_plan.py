@@ -0,0 +1,185 @@
+"""
+Query plan instrumentation.
+
+DataFilter.explain() returns the QueryPlan of the filter's query. With recording switched on
+(getRecorder().setEnabled(True) or MONGORM_RECORD_PLANS=1 in the environment) every distinct
+query shape is explained the first time it runs and counted after that, report() then lists the
+shapes and flags collection scans and queries that examine far more than they return.
+
+Explaining costs an extra round trip per new shape, keep recording off in production.
+"""
+import logging
+import os
+import threading
+
+_LOGGER = logging.getLogger(__name__)
+
+# Flag a query examining more than this many keys or documents per document returned
+EXAMINED_RATIO_LIMIT = 10
+
+
+class QueryPlan(object):
+    """Summary of an explain() result with execution stats"""
+
+    def __init__(self, explain):
+        self._explain = explain
+        self._stages = []
+        self._indexes = []
+
+        winningPlan = explain.get("queryPlanner", {}).get("winningPlan", {})
+        # servers running the slot based engine nest the classic plan one level down
+        self._walk(winningPlan.get("queryPlan", winningPlan))
+
+        stats = explain.get("executionStats", {})
+        self._returned = stats.get("nReturned", 0)
+        self._keysExamined = stats.get("totalKeysExamined", 0)
+        self._docsExamined = stats.get("totalDocsExamined", 0)
+        self._timeMs = stats.get("executionTimeMillis", 0)
+
+    def _walk(self, node):
+        if isinstance(node, dict):
+            if "stage" in node:
+                self._stages.append(node["stage"])
+            if "indexName" in node:
+                self._indexes.append(node["indexName"])
+            for value in node.values():
+                self._walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                self._walk(value)
+
+    def explain(self):
+        return self._explain
+
+    def stages(self):
+        return list(self._stages)
+
+    def indexes(self):
+        return list(self._indexes)
+
+    def returned(self):
+        return self._returned
+
+    def keysExamined(self):
+        return self._keysExamined
+
+    def docsExamined(self):
+        return self._docsExamined
+
+    def timeMs(self):
+        return self._timeMs
+
+    def isCollectionScan(self):
+        return "COLLSCAN" in self._stages
+
+    def examinedRatio(self):
+        """Keys or documents examined, whichever is larger, per document returned"""
+        return max(self._keysExamined, self._docsExamined) / float(max(self._returned, 1))
+
+    def problems(self, ratioLimit=EXAMINED_RATIO_LIMIT):
+        problems = []
+        if self.isCollectionScan():
+            problems.append("collection scan")
+        if self.examinedRatio() > ratioLimit:
+            problems.append("examined {:.0f} per document returned".format(self.examinedRatio()))
+        return problems
+
+    def summary(self):
+        return "{} index={} returned={} keys={} docs={} {}ms".format(
+            ">".join(reversed(self._stages)) or "?",
+            ",".join(self._indexes) or "-",
+            self._returned, self._keysExamined, self._docsExamined, self._timeMs)
+
+
+def _shape(value):
+    """Replace the values of a Mongo query with placeholders, keeping its keys and operators"""
+    if isinstance(value, dict):
+        return dict((key, _shape(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return [_shape(item) for item in value]
+    return "?"
+
+
+def queryShape(querySet):
+    """Return a key identifying the query of a queryset independently of its values"""
+    return "{} {} sort={} limit={}".format(
+        querySet._collection.name,
+        sorted(_shape(querySet._query).items()),
+        querySet._ordering,
+        bool(querySet._limit))
+
+
+class RecordedQuery(object):
+    def __init__(self, shape, plan):
+        self.shape = shape
+        self.plan = plan
+        self.runs = 1
+
+
+class QueryPlanRecorder(object):
+    """Explains each new query shape once and counts how often every shape runs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._enabled = os.getenv("MONGORM_RECORD_PLANS", "0") not in ("", "0")
+        self._records = {}
+        self._unexplained = set()
+
+    def enabled(self):
+        return self._enabled
+
+    def setEnabled(self, enabled):
+        self._enabled = bool(enabled)
+
+    def clear(self):
+        with self._lock:
+            self._records = {}
+            self._unexplained = set()
+
+    def records(self):
+        with self._lock:
+            return sorted(self._records.values(), key=lambda record: record.shape)
+
+    def observe(self, querySet):
+        shape = queryShape(querySet)
+        with self._lock:
+            record = self._records.get(shape)
+            if record is not None:
+                record.runs += 1
+                return
+            if shape in self._unexplained:
+                return
+
+        try:
+            plan = QueryPlan(querySet.clone().explain())
+        except Exception as e:
+            _LOGGER.warning("Could not explain query {}: {}".format(shape, e))
+            with self._lock:
+                self._unexplained.add(shape)
+            return
+
+        with self._lock:
+            if shape in self._records:
+                self._records[shape].runs += 1
+            else:
+                self._records[shape] = RecordedQuery(shape, plan)
+
+    def flagged(self, ratioLimit=EXAMINED_RATIO_LIMIT):
+        return [record for record in self.records() if record.plan.problems(ratioLimit)]
+
+    def report(self, ratioLimit=EXAMINED_RATIO_LIMIT):
+        lines = []
+        for record in self.records():
+            problems = record.plan.problems(ratioLimit)
+            lines.append("{} {}".format("!!" if problems else "ok", record.shape))
+            lines.append("   runs={} {}".format(record.runs, record.plan.summary()))
+            if problems:
+                lines.append("   " + ", ".join(problems))
+        return "\n".join(lines)
+
+
+_RECORDER = QueryPlanRecorder()
+
+
+def getRecorder():
+    return _RECORDER
@@ -0,0 +1,109 @@
+"""
+Single-flight query deduplication.
+
+The stem viewer, the twig viewer and the prefetchers load on worker threads and often ask for the
+same query at the same moment. DataInterface.all() runs its queries through SingleFlight.do(): the
+first caller of a key runs the query, callers arriving with the same key while it is in flight wait
+for it and share its result instead of making their own round trip. Nothing is kept once the query
+finishes, a later caller queries again.
+
+Counters of queries run and collapsed are in mongorm.stats()["single_flight"].
+"""
+import threading
+
+
+class _Call(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.thread = threading.current_thread()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight(object):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._enabled = True
+        self.resetStats()
+
+    def enabled(self):
+        return self._enabled
+
+    def setEnabled(self, enabled):
+        self._enabled = bool(enabled)
+
+    def do(self, key, function):
+        """
+        Return (result, shared): function()'s result, or the result of the call already running
+        for key, shared is True when it came from another caller's call. The running call's
+        exception is raised in every caller waiting on it.
+        """
+        if not self._enabled:
+            return function(), False
+
+        with self._lock:
+            call = self._calls.get(key)
+            # a call can't wait for itself, the same thread asking again runs its own query
+            if call is not None and call.thread is not threading.current_thread():
+                call.waiters += 1
+                self._collapsed += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = function()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                if call.waiters:
+                    self._shared += 1
+            call.done.set()
+
+        return call.result, False
+
+    def resetAfterFork(self):
+        """Replace the lock and forget the calls in a forked child, the threads running them didn't come along"""
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def inFlight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def resetStats(self):
+        with self._lock:
+            self._executed = 0
+            self._collapsed = 0
+            self._shared = 0
+
+    def stats(self):
+        """executed: queries run, collapsed: callers served another caller's query, shared: queries served several callers"""
+        with self._lock:
+            return {
+                "executed": self._executed,
+                "collapsed": self._collapsed,
+                "shared": self._shared
+            }
+
+
+_GROUP = SingleFlight()
+
+
+def getGroup():
+    return _GROUP
@@ -10,7 +10,7 @@ class Job(BaseJinxObject, mongoengine.Document):
     """
 
     _name = "Job"
-    meta = {'collection': 'job'}
+    meta = {'collection': 'job', 'indexes': [('deleted', 'archived')]}
     INTERFACE_STRING = "job"
 
     # Required fields
@@ -92,7 +92,10 @@ class Stem(BaseJinxObject, mongoengine.Document):
     """
 
     _name = "Stem"
-    meta = {'collection': 'stem'}
+    meta = {
+        'collection': 'stem',
+        'indexes': [('parent_uuid', 'deleted', 'archived'), ('job', 'deleted', 'archived')]
+    }
     INTERFACE_STRING = "stem"
 
     # Required fields
@@ -121,12 +124,7 @@ class Stem(BaseJinxObject, mongoengine.Document):
 
     def parent(self, interfaceType):
         super(Stem, self).parent()
-        db = mongorm.getHandler()
-        filt = mongorm.getFilter()
-        filt.search(db[interfaceType], uuid=self.parent_uuid)
-        job = db[interfaceType].one(filt)
-
-        return job
+        return mongorm.getHandler()[interfaceType].get(self.parent_uuid)
 
     def siblings(self, includeSelf=False):
         db = mongorm.getHandler()
@@ -149,7 +147,7 @@ class Twig(BaseJinxObject, mongoengine.Document):
     """
 
     _name = "Twig"
-    meta = {'collection': 'twig'}
+    meta = {'collection': 'twig', 'indexes': [('stem_uuid', 'deleted', 'archived')]}
     INTERFACE_STRING = "twig"
 
     # Required fields
@@ -167,6 +165,9 @@ class Twig(BaseJinxObject, mongoengine.Document):
         Returns all stalk versions associated with this (self) twig.
         """
         super(Twig, self).children()
+        if self._prefetchedChildren is not None:
+            return self._prefetchedChildren.copy() if self._prefetchedChildren.hasObjects() else None
+
         db = mongorm.getHandler()
         filt = mongorm.getFilter()
         filt.search(db['stalk'], twig_uuid=self.uuid)
@@ -178,12 +179,7 @@ class Twig(BaseJinxObject, mongoengine.Document):
 
     def parent(self):
         super(Twig, self).parent()
-        db = mongorm.getHandler()
-        filt = mongorm.getFilter()
-        filt.search(db['stem'], uuid=self.stem_uuid)
-        stem = db['stem'].one(filt)
-
-        return stem
+        return mongorm.getHandler()['stem'].get(self.stem_uuid)
 
     def latest(self):
         """
@@ -217,7 +213,7 @@ class Stalk(BaseJinxObject, mongoengine.Document):
     """
 
     _name = 'stalk'
-    meta = {'collection': 'stalk'}
+    meta = {'collection': 'stalk', 'indexes': [('twig_uuid', 'deleted', 'archived')]}
     INTERFACE_STRING = "stalk"
 
     # Required fields
@@ -236,6 +232,9 @@ class Stalk(BaseJinxObject, mongoengine.Document):
         Returns all leaf objects associated with this (self) stalk.
         """
         super(Stalk, self).children()
+        if self._prefetchedChildren is not None:
+            return self._prefetchedChildren.copy() if self._prefetchedChildren.hasObjects() else None
+
         db = mongorm.getHandler()
         filt = mongorm.getFilter()
         filt.search(db['leaf'], stalk_uuid=self.uuid)
@@ -247,12 +246,7 @@ class Stalk(BaseJinxObject, mongoengine.Document):
 
     def parent(self):
         super(Stalk, self).parent()
-        db = mongorm.getHandler()
-        filt = mongorm.getFilter()
-        filt.search(db['twig'], uuid=self.twig_uuid)
-        stem = db['twig'].one(filt)
-
-        return stem
+        return mongorm.getHandler()['twig'].get(self.twig_uuid)
 
     def siblings(self, includeSelf=True):
         db = mongorm.getHandler()
@@ -275,7 +269,7 @@ class Leaf(BaseJinxObject, mongoengine.Document):
     """
 
     _name = 'leaf'
-    meta = {'collection': 'leaf'}
+    meta = {'collection': 'leaf', 'indexes': [('stalk_uuid', 'deleted', 'archived')]}
     INTERFACE_STRING = "leaf"
 
     # Required fields
@@ -289,12 +283,7 @@ class Leaf(BaseJinxObject, mongoengine.Document):
 
     def parent(self):
         super(Leaf, self).parent()
-        db = mongorm.getHandler()
-        filt = mongorm.getFilter()
-        filt.search(db['stalk'], uuid=self.stalk_uuid)
-        stalk = db['stalk'].one(filt)
-
-        return stalk
+        return mongorm.getHandler()['stalk'].get(self.stalk_uuid)
 
     def siblings(self, includeSelf=True):
         db = mongorm.getHandler()
@@ -0,0 +1,46 @@
+"""
+Lazily imported package attributes, on Python 2 and 3.
+
+A package calls install() at the end of its __init__ with the names to resolve on first access,
+e.g. mongorm.DbHandler or jinxqt.common, so that importing the package itself stays cheap:
+
+    lazy_module.install(__name__, {
+        "DbHandler": ("mongorm.base.db_handler", "DbHandler"),   # an attribute of a module
+        "interfaces": ("mongorm.interfaces", None),              # a module
+    })
+"""
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Stands in for a package in sys.modules, importing its lazy attributes when they are first used"""
+
+    def __init__(self, module, lazyAttributes):
+        super(LazyModule, self).__init__(module.__name__, module.__doc__)
+        self.__dict__.update(module.__dict__)
+        # Python 2 clears a module's globals once the module is garbage collected, its functions still use them
+        self.__dict__["_lazyOriginal"] = module
+        self.__dict__["_lazyAttributes"] = dict(lazyAttributes)
+
+    def __getattr__(self, name):
+        # only called when the attribute isn't set yet
+        try:
+            moduleName, attr = self.__dict__["_lazyAttributes"][name]
+        except KeyError:
+            raise AttributeError("module {!r} has no attribute {!r}".format(self.__name__, name))
+        module = importlib.import_module(moduleName)
+        value = getattr(module, attr) if attr else module
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(self.__dict__["_lazyAttributes"]))
+
+
+def install(name, lazyAttributes):
+    """Replace the module name in sys.modules by a LazyModule resolving lazyAttributes {name: (module, attribute)}"""
+    module = LazyModule(sys.modules[name], lazyAttributes)
+    sys.modules[name] = module
+    return module
@@ -73,6 +73,7 @@ SVG_PATH = os.path.join(PACKAGE_PATH, 'svg')
 # File names
 QSS_FILE = 'style.qss'
 QRC_FILE = QSS_FILE.replace('.qss', '.qrc')
+RCC_FILE = QSS_FILE.replace('.qss', '.rcc')
 
 MAIN_SCSS_FILE = 'main.scss'
 STYLES_SCSS_FILE = '_styles.scss'
@@ -81,6 +82,7 @@ VARIABLES_SCSS_FILE = '_variables.scss'
 # File paths
 QSS_FILEPATH = os.path.join(PACKAGE_PATH, QSS_FILE)
 QRC_FILEPATH = os.path.join(PACKAGE_PATH, QRC_FILE)
+RCC_FILEPATH = os.path.join(PACKAGE_PATH, RCC_FILE)
 
 MAIN_SCSS_FILEPATH = os.path.join(QSS_PATH, MAIN_SCSS_FILE)
 STYLES_SCSS_FILEPATH = os.path.join(QSS_PATH, STYLES_SCSS_FILE)
@@ -113,6 +115,32 @@ def _apply_application_patches(QCoreApplication, QPalette, QColor):
                      "instantiation of QApplication to take effect. ")
 
 
+_RESOURCES_REGISTERED = False
+
+
+def _register_resources():
+    """
+    Register the style resources with Qt, only once per process.
+
+    The binary resource file (style.rcc) is memory mapped by Qt, so its pages
+    are shared between processes and nothing has to be unmarshalled at import
+    time. The generated Python module (style_rc) is only imported as a
+    fallback when the binary file is missing or can't be registered.
+    """
+    global _RESOURCES_REGISTERED
+
+    if _RESOURCES_REGISTERED:
+        return
+
+    from qtpy.QtCore import QResource
+
+    if not (os.path.isfile(RCC_FILEPATH) and QResource.registerResource(RCC_FILEPATH)):
+        _logger.debug("Binary resources not available, importing style_rc")
+        from qdarkstyle import style_rc
+
+    _RESOURCES_REGISTERED = True
+
+
 def _load_stylesheet(qt_api=''):
     """
     Load the stylesheet based on QtPy abstraction layer environment variable.
@@ -146,14 +174,14 @@ def _load_stylesheet(qt_api=''):
     from qtpy.QtCore import QCoreApplication, QFile, QTextStream
     from qtpy.QtGui import QColor, QPalette
 
-    # Then we import resources - binary qrc content
-    from qdarkstyle import style_rc
+    # Then we register resources - binary rcc content
+    _register_resources()
 
-    # Thus, by importing the binary we can access the resources
+    # Thus, by registering the binary we can access the resources
     package_dir = os.path.basename(PACKAGE_PATH)
     qss_rc_path = ":" + os.path.join(package_dir, QSS_FILE)
 
-    # It gets the qss file from compiled style_rc that was import
+    # It gets the qss file from the registered resources
     # not from the file QSS as we are using resources
     qss_file = QFile(qss_rc_path)
 
@@ -10,6 +10,7 @@ from __future__ import absolute_import, division, print_function
 import logging
 import os
 import re
+import subprocess
 import tempfile
 
 # Third party imports
@@ -18,8 +19,8 @@ from qtpy.QtGui import QIcon
 from qtpy.QtWidgets import QApplication
 
 # Local imports
-from qdarkstyle import (IMAGES_PATH, STYLES_SCSS_FILEPATH, QRC_FILEPATH, RC_PATH,
-                        SVG_PATH)
+from qdarkstyle import (IMAGES_PATH, STYLES_SCSS_FILEPATH, QRC_FILEPATH, RCC_FILEPATH,
+                        RC_PATH, SVG_PATH)
 from qdarkstyle.palette import DarkPalette
 
 IMAGE_BLACKLIST = ['base_palette']
@@ -257,6 +258,27 @@ def generate_qrc_file(resource_prefix='qss_icons', style_prefix='qdarkstyle'):
         fh.write(qrc_content)
 
 
+def compile_qrc_file(rcc_tool='rcc'):
+    """
+    Compile the QRC file into the binary resource file (style.rcc).
+
+    The binary file is registered with QResource.registerResource at load
+    time, style_rc.py is only kept as a fallback.
+
+    Args:
+        rcc_tool (str, optional): Qt resource compiler executable.
+            Defaults to 'rcc'.
+
+    Returns:
+        int: return code of the resource compiler.
+    """
+
+    _logger.info("Compiling %s into %s" % (QRC_FILEPATH, RCC_FILEPATH))
+
+    return subprocess.call([rcc_tool, '-binary', QRC_FILEPATH, '-o', RCC_FILEPATH],
+                           cwd=os.path.dirname(QRC_FILEPATH))
+
+
 def get_rc_links_from_scss(pattern=r"\/.*\.png"):
     """
     Get all rc links from scss file returning the list of unique links.
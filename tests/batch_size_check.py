@@ -0,0 +1,76 @@
+"""
+Check that the filter's cursor batch size reaches the server on every read path, exits non-zero on failure.
+
+mongoengine drops the batch size whenever a queryset is cloned (no_cache(), as_pymongo(), skip(), ..),
+so each path is checked on the batchSize of the find commands it sends. Runs against the benchmark
+database, see database_benchmark.use_bench_database.
+"""
+import sys
+
+from pymongo import monitoring
+
+import mongorm
+from database_benchmark import make_stalk_dataset
+
+
+class FindRecorder(monitoring.CommandListener):
+    """Keeps the batchSize of every find command"""
+
+    def __init__(self):
+        self.batchSizes = []
+
+    def started(self, event):
+        if event.command_name == "find":
+            self.batchSizes.append(event.command.get("batchSize"))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def check_paths(recorder, batch_size=37, explicit_batch_size=11):
+    """Read the same filter through every path, return the paths whose finds didn't carry the batch size"""
+    db = mongorm.getHandler()
+    filt = mongorm.getFilter()
+    filt.search(db['stalk'])
+    filt.setBatchSize(batch_size)
+    lazy = db['stalk'].all_lazy(filt)
+
+    paths = [
+        ("all", lambda: db['stalk'].all(filt), batch_size),
+        ("all raw", lambda: db['stalk'].all(filt, raw=True), batch_size),
+        ("iter", lambda: list(db['stalk'].iter(filt)), batch_size),
+        ("iter raw", lambda: list(db['stalk'].iter(filt, raw=True)), batch_size),
+        ("iter raw batch_size", lambda: list(db['stalk'].iter(filt, batch_size=explicit_batch_size, raw=True)),
+         explicit_batch_size),
+        ("lazy iter", lambda: list(lazy), batch_size),
+        ("lazy page", lambda: lazy[100:200], batch_size),
+    ]
+
+    failures = []
+    for label, read, expected in paths:
+        recorder.batchSizes = []
+        read()
+        print("{:<20} find batchSize {}".format(label, recorder.batchSizes))
+        if not recorder.batchSizes or any(size != expected for size in recorder.batchSizes):
+            failures.append(label)
+    return failures
+
+
+def main(count=2000):
+    # registered before make_stalk_dataset connects, clients only pick up listeners registered before them
+    recorder = FindRecorder()
+    monitoring.register(recorder)
+    make_stalk_dataset(count=count)
+
+    failures = check_paths(recorder)
+    if failures:
+        print("Batch size lost on: {}".format(", ".join(failures)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,409 @@
+import datetime
+import mongorm
+import os
+import random
+import resource
+import tempfile
+import time
+import timeit
+import uuid
+
+BENCH_DATABASE = "jinx_bench"
+
+
+def use_bench_database():
+    """Point mongorm at the scratch benchmark database, never the production one"""
+    from mongorm.base import connection_manager
+    manager = connection_manager.ConnectionManager(database=BENCH_DATABASE)
+    connection_manager.setManager(manager)
+    manager.connect()
+
+
+def make_stalk_dataset(count=100000, deleted_ratio=0.0, twigs=200):
+    """Fill the benchmark database's stalk collection with count documents spread over twigs"""
+    from mongorm.interfaces import Stalk
+
+    use_bench_database()
+    collection = Stalk._get_collection()
+    collection.drop()
+
+    twig_uuids = [uuid.uuid4() for _ in range(twigs)]
+    now = datetime.datetime.now()
+    batch = []
+    for index in range(count):
+        _id = uuid.uuid4()
+        batch.append({
+            "_id": _id,
+            "uuid": str(_id),
+            "label": "v{:03d}".format(index % 999 + 1),
+            "path": "/jobs/BENCH/stalk/{}".format(index),
+            "job": "BENCH",
+            "created": now,
+            "modified": now,
+            "created_by": "bench",
+            "comment": "benchmark stalk {}".format(index),
+            "status": "Available",
+            "version": index % 999 + 1,
+            "twig_uuid": twig_uuids[index % twigs],
+            "state": "complete",
+            "deleted": random.random() < deleted_ratio,
+            "archived": False
+        })
+        if len(batch) == 5000:
+            collection.insert_many(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch)
+
+    Stalk.ensure_indexes()
+    return twig_uuids
+
+
+def walk_twig_tree(stem):
+    """Populate the full twig > stalk > leaf tree of a stem the way TwigDataSource does, return the node count"""
+    count = 0
+    twigs = stem.children("twig")
+    for twig in twigs or []:
+        count += 1
+        for stalk in twig.children() or []:
+            count += 1
+            leafs = stalk.children()
+            count += len(leafs) if leafs else 0
+    return count
+
+
+def bench_get_handler(number=10000):
+    """Per-call cost of mongorm.getHandler() once the shared handler exists"""
+    from mongorm.base.db_handler import DbHandler
+
+    mongorm.getHandler()
+    shared = timeit.timeit(mongorm.getHandler, number=number)
+    fresh = timeit.timeit(DbHandler, number=number)
+
+    print("getHandler() shared: {:.2f} us/call".format(shared / number * 1e6))
+    print("DbHandler() fresh:   {:.2f} us/call".format(fresh / number * 1e6))
+
+
+def bench_connection_profiles(stem_label, latency_ms=40, mongo_port=27017):
+    """
+    Twig tree population over a simulated WAN link (a local mongod behind LatencyProxy),
+    comparing the LAN and WAN connection profiles on bytes relayed and wall time.
+    """
+    from latency_proxy import LatencyProxy
+    from mongorm.base import connection_manager, connection_profile, host_resolver
+
+    proxy = LatencyProxy(targetPort=mongo_port, latencyMs=latency_ms).start()
+    cacheFile = os.path.join(tempfile.mkdtemp(), "mongo_host.json")
+
+    for profile in (connection_profile.LAN_PROFILE, connection_profile.WAN_PROFILE):
+        resolver = host_resolver.HostResolver(candidates=["127.0.0.1"], port=proxy.port(), cacheFile=cacheFile)
+        manager = connection_manager.ConnectionManager(port=proxy.port(), resolver=resolver)
+        manager.setProfile(profile)
+        connection_manager.setManager(manager)
+
+        db = mongorm.getHandler()
+        filt = mongorm.getFilter()
+        filt.search(db['stem'], label=stem_label)
+        stem = db['stem'].one(filt)
+        assert db['stalk'].objectPrototype._get_collection().database.client is manager.client(), \
+            "stalk queries don't go through the {} profile's client".format(profile.name())
+
+        proxy.resetCounters()
+        start = time.time()
+        nodes = walk_twig_tree(stem)
+        elapsed = time.time() - start
+
+        print("{}: {} nodes in {:.2f}s, {} bytes down, {} bytes up, compressors={}".format(
+            profile.name(), nodes, elapsed, proxy.bytesDown, proxy.bytesUp, profile.compressors()))
+
+        # closes the profile's client and drops the Document collections cached on it, the next
+        # profile's queries go through its own client
+        manager.disconnect()
+
+    proxy.stop()
+
+
+def bench_omit_deleted(count=100000, deleted_ratio=0.8):
+    """Deleted omission compiled into the query against fetching everything and dropping deleted in Python"""
+    from mongorm.base import monitoring
+
+    make_stalk_dataset(count=count, deleted_ratio=deleted_ratio)
+    db = mongorm.getHandler()
+    monitoring.getStats().setCountBytes(True)
+
+    filt = mongorm.getFilter()
+    filt.search(db['stalk'])
+    mongorm.resetStats()
+    start = time.time()
+    server = len(db['stalk'].all(filt))
+    server_time = time.time() - start
+    server_bytes = mongorm.stats()["bytes_received"]
+
+    filt.omitDeleted(False)
+    mongorm.resetStats()
+    start = time.time()
+    python = len([stalk for stalk in db['stalk'].all(filt) if not stalk.get("deleted")])
+    python_time = time.time() - start
+    python_bytes = mongorm.stats()["bytes_received"]
+
+    assert server == python
+    print("{} of {} stalks live".format(server, count))
+    print("query omission:  {:.2f}s, {} bytes".format(server_time, server_bytes))
+    print("python omission: {:.2f}s, {} bytes".format(python_time, python_bytes))
+
+
+def bench_count(count=100000, deleted_ratio=0.2):
+    """Server-side count_documents against hydrating every object to take its length"""
+    twig_uuids = make_stalk_dataset(count=count, deleted_ratio=deleted_ratio)
+    db = mongorm.getHandler()
+
+    for label, strings in (("all", {}), ("one twig", {"twig_uuid": twig_uuids[0]})):
+        filt = mongorm.getFilter()
+        filt.search(db['stalk'], **strings)
+
+        start = time.time()
+        server = filt.count(refresh=True)
+        server_time = time.time() - start
+
+        start = time.time()
+        python = len(filt.objects())
+        python_time = time.time() - start
+
+        assert server == python
+        print("{:<9} {} stalks  count_documents: {:.1f} ms  len(objects()): {:.1f} ms".format(
+            label, server, server_time * 1000, python_time * 1000))
+
+
+def bench_projection(count=100000, columns=("label", "version", "modified", "created", "created_by", "path", "uuid")):
+    """Column projection against whole documents, on bytes received and hydration time"""
+    from mongorm.base import monitoring
+
+    make_stalk_dataset(count=count)
+    db = mongorm.getHandler()
+    monitoring.getStats().setCountBytes(True)
+
+    for label, fields in (("whole documents", None), ("projected", columns)):
+        filt = mongorm.getFilter()
+        filt.search(db['stalk'])
+        if fields:
+            filt.only(*fields)
+
+        mongorm.resetStats()
+        start = time.time()
+        stalks = db['stalk'].all(filt)
+        elapsed = time.time() - start
+        print("{:<16} {} stalks in {:.2f}s, {} bytes".format(
+            label, len(stalks), elapsed, mongorm.stats()["bytes_received"]))
+
+
+def bench_keyset_pagination(count=500000, page_size=500, depths=(0, 10, 100, 500, 900)):
+    """Page fetch time at increasing depth, keyset cursor against skip/limit"""
+    make_stalk_dataset(count=count)
+    db = mongorm.getHandler()
+
+    filt = mongorm.getFilter()
+    filt.search(db['stalk'])
+    filt.setLimit(page_size)
+    cursors = {0: None}
+    page = db['stalk'].all(filt)
+    for number in range(1, max(depths) + 1):
+        if len(page) < page_size:
+            break
+        filt.setPageAfter(page[-1])
+        if number in depths:
+            cursors[number] = filt.pageAfter()
+        page = db['stalk'].all(filt)
+
+    for depth in sorted(cursors):
+        keyset = mongorm.getFilter()
+        keyset.search(db['stalk'])
+        keyset.setLimit(page_size)
+        keyset.setPageAfter(cursors[depth])
+        start = time.time()
+        keyset_page = db['stalk'].all(keyset)
+        keyset_time = time.time() - start
+
+        querySet = keyset.querySet(paged=False).order_by("+_id")
+        start = time.time()
+        skip_page = list(querySet.skip(depth * page_size).limit(page_size))
+        skip_time = time.time() - start
+
+        assert [stalk.uuid for stalk in keyset_page] == [stalk.uuid for stalk in skip_page]
+
+        print("page {:>4}  keyset: {:.1f} ms  skip/limit: {:.1f} ms".format(depth, keyset_time * 1000, skip_time * 1000))
+
+
+def bench_stream_memory(count=200000, batch_size=1000):
+    """
+    Peak resident memory of a full pass over the stalks, streamed with iter() and then
+    materialized with all(). Streaming runs first since the peak only ever grows.
+    """
+    make_stalk_dataset(count=count)
+    db = mongorm.getHandler()
+    filt = mongorm.getFilter()
+    filt.search(db['stalk'])
+
+    def peak_mb():
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+    baseline = peak_mb()
+    start = time.time()
+    streamed = sum(1 for _ in db['stalk'].iter(filt, batch_size=batch_size))
+    print("iter(): {} stalks in {:.2f}s, peak +{:.1f} MB".format(streamed, time.time() - start, peak_mb() - baseline))
+
+    start = time.time()
+    loaded = len(db['stalk'].all(filt))
+    print("all():  {} stalks in {:.2f}s, peak +{:.1f} MB".format(loaded, time.time() - start, peak_mb() - baseline))
+
+
+def bench_hydration(count=100000):
+    """Document hydration against RawJinxObject records, end to end and on already fetched documents"""
+    from mongorm.core.dataobject import RawJinxObject
+    from mongorm.interfaces import Stalk
+
+    make_stalk_dataset(count=count)
+    db = mongorm.getHandler()
+    filt = mongorm.getFilter()
+    filt.search(db['stalk'])
+
+    for raw in (False, True):
+        start = time.time()
+        loaded = len(db['stalk'].all(filt, raw=raw))
+        print("all(raw={}): {} stalks in {:.2f}s".format(raw, loaded, time.time() - start))
+
+    documents = list(filt.querySet().as_pymongo())
+    start = time.time()
+    for document in documents:
+        Stalk._from_son(document)
+    hydrate_time = time.time() - start
+
+    start = time.time()
+    for document in documents:
+        RawJinxObject(db['stalk'], document).get("label")
+    raw_time = time.time() - start
+
+    print("hydration only: _from_son {:.2f}s, RawJinxObject {:.2f}s".format(hydrate_time, raw_time))
+
+
+def bench_query_build(number=20000, twigs=200):
+    """
+    Python-side cost of building a children() query, mongoengine translating the filter strings
+    every call against filling the values into the cached query template of the shape
+    """
+    from mongorm.core import query_cache
+
+    use_bench_database()
+    db = mongorm.getHandler()
+    twig_uuids = [uuid.uuid4() for _ in range(twigs)]
+
+    def build():
+        for index in range(number):
+            filt = mongorm.getFilter()
+            filt.search(db['stalk'], twig_uuid=twig_uuids[index % twigs])
+            filt.querySet()._query
+
+    for enabled in (False, True):
+        query_cache.setEnabled(enabled)
+        elapsed = timeit.timeit(build, number=1)
+        print("query templates {}: {:.1f} us/query".format("on " if enabled else "off", elapsed / number * 1e6))
+
+
+def make_twig_tree(twigs=200, stalks=5000, leafs_per_stalk=2):
+    """Fill the benchmark database with one stem's twigs, stalks and leafs, return the stem uuid"""
+    from mongorm.interfaces import Twig, Leaf, Stalk
+
+    twig_uuids = make_stalk_dataset(count=stalks, twigs=twigs)
+    stem_uuid = uuid.uuid4()
+    now = datetime.datetime.now()
+
+    def base(_id, label, index):
+        return {"_id": _id, "uuid": str(_id), "label": label, "path": "/jobs/BENCH/{}/{}".format(label, index),
+                "job": "BENCH", "created": now, "modified": now, "created_by": "bench",
+                "deleted": False, "archived": False}
+
+    for prototype in (Twig, Leaf):
+        prototype._get_collection().drop()
+
+    Twig._get_collection().insert_many([
+        dict(base(twig_uuid, "twig{:03d}".format(index), index), stem_uuid=stem_uuid, task="anim")
+        for index, twig_uuid in enumerate(twig_uuids)])
+
+    leafs = []
+    for stalk in Stalk._get_collection().find({}, {"_id": 1}):
+        for index in range(leafs_per_stalk):
+            leafs.append(dict(base(uuid.uuid4(), "leaf{}".format(index), index), stalk_uuid=stalk["_id"], format="exr"))
+    Leaf._get_collection().insert_many(leafs)
+
+    for prototype in (Twig, Leaf):
+        prototype.ensure_indexes()
+    mongorm.getHandler().refresh()
+    return stem_uuid
+
+
+def bench_fetch_subtree(twigs=200, stalks=5000, leafs_per_stalk=2):
+    """Twig tree population, children() queries per twig and stalk against one fetchSubtree() aggregation"""
+    stem_uuid = make_twig_tree(twigs=twigs, stalks=stalks, leafs_per_stalk=leafs_per_stalk)
+    db = mongorm.getHandler()
+
+    def walk(twigs):
+        count = 0
+        for twig in twigs:
+            count += 1
+            for stalk in twig.children() or []:
+                count += 1 + stalk.childCount()
+        return count
+
+    for label, fetch in (("children()", db['twig'].all), ("fetchSubtree()", db['twig'].fetchSubtree)):
+        filt = mongorm.getFilter()
+        filt.search(db['twig'], stem_uuid=stem_uuid)
+        mongorm.resetStats()
+        start = time.time()
+        nodes = walk(fetch(filt))
+        print("{:<15} {} nodes in {:.2f}s, {} round trips".format(
+            label, nodes, time.time() - start, mongorm.stats()["round_trips"]))
+
+
+def bench_batch_size(count=100000, latency_ms=40, mongo_port=27017):
+    """
+    Full stalk scan over a simulated WAN link (a local mongod behind LatencyProxy), the WAN profile's
+    fixed batch size against adaptive sizing before and after the total was counted
+    """
+    from latency_proxy import LatencyProxy
+    from mongorm.base import connection_manager, connection_profile, host_resolver
+
+    make_stalk_dataset(count=count)
+    proxy = LatencyProxy(targetPort=mongo_port, latencyMs=latency_ms).start()
+    cacheFile = os.path.join(tempfile.mkdtemp(), "mongo_host.json")
+    resolver = host_resolver.HostResolver(candidates=["127.0.0.1"], port=proxy.port(), cacheFile=cacheFile)
+    manager = connection_manager.ConnectionManager(database=BENCH_DATABASE, port=proxy.port(), resolver=resolver)
+    manager.setProfile(connection_profile.WAN_PROFILE)
+    connection_manager.setManager(manager)
+    manager.healthCheck()
+
+    db = mongorm.getHandler()
+    runs = (
+        ("fixed {}".format(connection_profile.WAN_PROFILE.batchSize()), connection_profile.WAN_PROFILE.batchSize(), False),
+        ("adaptive", None, False),
+        ("adaptive, counted", None, True),
+    )
+    for label, batch_size, counted in runs:
+        db['stalk'].clearDataCache()
+        filt = mongorm.getFilter()
+        filt.search(db['stalk'])
+        filt.setBatchSize(batch_size)
+        if counted:
+            filt.count()
+
+        mongorm.resetStats()
+        start = time.time()
+        loaded = len(db['stalk'].all(filt))
+        elapsed = time.time() - start
+        commands = mongorm.stats()["commands"]
+        print("{:<18} batch={} {} stalks in {:.2f}s, {} find + {} getMore".format(
+            label, filt.cursorBatchSize(), loaded, elapsed, commands.get("find", 0), commands.get("getMore", 0)))
+
+    proxy.stop()
+
+
+if __name__ == '__main__':
+    bench_get_handler()
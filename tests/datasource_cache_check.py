@@ -0,0 +1,84 @@
+"""
+Data source cache check, exits non-zero when revisiting cached results queries the database.
+
+Loads a stem's twigs into a TwigDataSource, switches to a search and back, then re-sorts. Going
+back and re-sorting are answered by the data source's result cache, so mongorm.stats() has to
+count no round trip for them. Runs against the benchmark database, see
+database_benchmark.use_bench_database.
+"""
+import os
+import sys
+import threading
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from qtpy import QtCore, QtWidgets
+
+import mongorm
+from mongorm.core.filter_expression import field
+from database_benchmark import make_twig_tree
+
+
+def wait_for_counts(app):
+    """Let the background counts finish and deliver their totals, they query on their own threads"""
+    for thread in threading.enumerate():
+        if thread.name.startswith("mongorm-count-"):
+            thread.join()
+    app.processEvents()
+
+
+def visit(app, dataSource, label, refresh):
+    """Run refresh() and fetch the data source's rows, return (label, rows, round trips)"""
+    wait_for_counts(app)
+    mongorm.resetStats()
+    refresh()
+    rows = len(dataSource.fetchItems(QtCore.QModelIndex()))
+    wait_for_counts(app)
+    roundTrips = mongorm.stats()["round_trips"]
+    print("{:<22} {:>4} rows, {} round trips".format(label, rows, roundTrips))
+    return label, rows, roundTrips
+
+
+def column(dataSource, code):
+    for index in range(len(dataSource.headerItem)):
+        descriptor = dataSource.headerItem.data(index, role=dataSource.ROLE_COLUMN_DESCRIPTER)
+        if descriptor and descriptor.code == code:
+            return index
+    raise KeyError(code)
+
+
+def check_revisits(app, stem_uuid):
+    """Return the visits answered from the cache that still went to the database"""
+    from jinxqt.modelview.datasource.interfaces.twig import TwigDataSource
+
+    db = mongorm.getHandler()
+    dataSource = TwigDataSource(db)
+    dataSource._filter.search(db['twig'], stem_uuid=stem_uuid)
+
+    first = visit(app, dataSource, "first visit", lambda: None)
+    visit(app, dataSource, "search", lambda: dataSource.setSearchExpression(field("label").startswith("twig00")))
+    revisits = [
+        visit(app, dataSource, "back to the stem", lambda: dataSource.setSearchExpression(None)),
+        visit(app, dataSource, "re-sort", lambda: dataSource.sortByColumns(
+            [column(dataSource, "label")], [QtCore.Qt.DescendingOrder])),
+    ]
+
+    if not first[2]:
+        print("The first visit made no round trip, the stats don't see this connection")
+        return ["first visit"]
+    return [label for label, rows, roundTrips in revisits if roundTrips or rows != first[1]]
+
+
+def main(twigs=20, stalks=200):
+    app = QtWidgets.QApplication(sys.argv)
+    stem_uuid = make_twig_tree(twigs=twigs, stalks=stalks, leafs_per_stalk=2)
+
+    failures = check_revisits(app, stem_uuid)
+    if failures:
+        print("Not answered from the cache: {}".format(", ".join(failures)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
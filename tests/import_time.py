@@ -0,0 +1,51 @@
+"""
+Cold import budget check, exits non-zero when a module goes over its budget.
+
+Each module is imported in a fresh interpreter so nothing is shared between measurements.
+mongorm must also import without pulling in Qt, so farm scripts don't pay for the GUI stack.
+"""
+import subprocess
+import sys
+
+# module: (budget in seconds, modules that must not be loaded by the import)
+IMPORT_BUDGETS = {
+    "mongorm": (0.05, ["qtpy", "mongoengine", "pymongo"]),
+    "mongorm.interfaces": (0.75, ["qtpy", "requests"]),
+    "jinx.platform": (0.05, ["qtpy", "qdarkstyle", "mongoengine"]),
+}
+
+MEASURE = """
+import sys, time
+start = time.time()
+import {module}
+elapsed = time.time() - start
+print(elapsed)
+print(",".join(name for name in {forbidden!r} if name in sys.modules))
+"""
+
+
+def measure(module, forbidden):
+    output = subprocess.check_output([sys.executable, "-c", MEASURE.format(module=module, forbidden=forbidden)])
+    lines = output.decode().strip().splitlines()
+    loaded = [name for name in lines[1].split(",") if name] if len(lines) > 1 else []
+    return float(lines[0]), loaded
+
+
+def main():
+    failed = False
+    for module, (budget, forbidden) in sorted(IMPORT_BUDGETS.items()):
+        elapsed, loaded = measure(module, forbidden)
+        status = "ok"
+        if elapsed > budget:
+            status = "OVER BUDGET ({:.3f}s)".format(budget)
+            failed = True
+        if loaded:
+            status += " loaded {}".format(", ".join(loaded))
+            failed = True
+        print("{:<24} {:.3f}s  {}".format(module, elapsed, status))
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
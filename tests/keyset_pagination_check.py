@@ -0,0 +1,84 @@
+"""
+Keyset pagination check, exits non-zero when paging through a filter loses or repeats rows.
+
+Sorts the stalks on a key only some of them have (thumbnail), in both directions, and pages
+through them with the keyset cursor and with LazyDataContainer slices. Every row has to come back
+exactly once and in the order of the unpaged query. Runs against the benchmark database, see
+database_benchmark.use_bench_database.
+"""
+import sys
+
+import pymongo
+
+import mongorm
+from database_benchmark import make_stalk_dataset
+
+
+def set_thumbnails(ratio=0.5):
+    """Give a share of the stalks a thumbnail, the rest have none"""
+    from mongorm.interfaces import Stalk
+
+    collection = Stalk._get_collection()
+    ids = [document["_id"] for document in collection.find({}, {"_id": 1})]
+    with_thumbnail = ids[:int(len(ids) * ratio)]
+    for index, _id in enumerate(with_thumbnail):
+        collection.update_one({"_id": _id}, {"$set": {"thumbnail": "/thumbs/{:03d}.jpg".format(index % 7)}})
+    return len(ids)
+
+
+def keyset_pages(db, sort, page_size):
+    filt = mongorm.getFilter()
+    filt.search(db['stalk'])
+    filt.sort(*sort)
+    filt.setLimit(page_size)
+    uuids = []
+    while True:
+        page = db['stalk'].all(filt)
+        uuids.extend(stalk.uuid for stalk in page)
+        if len(page) < page_size:
+            return uuids
+        filt.setPageAfter(page[-1])
+
+
+def lazy_slices(db, sort, page_size):
+    filt = mongorm.getFilter()
+    filt.search(db['stalk'])
+    filt.sort(*sort)
+    lazy = db['stalk'].all_lazy(filt)
+    uuids = []
+    for start in range(0, len(lazy), page_size):
+        uuids.extend(stalk.uuid for stalk in lazy[start:start + page_size])
+    return uuids
+
+
+def check_sorts(page_size=3):
+    """Return the sorts whose pages don't match the unpaged query"""
+    db = mongorm.getHandler()
+    failures = []
+    for sort in ((("thumbnail", pymongo.DESCENDING),),
+                 (("thumbnail", pymongo.ASCENDING),),
+                 (("thumbnail", pymongo.DESCENDING), ("label", pymongo.ASCENDING))):
+        filt = mongorm.getFilter()
+        filt.search(db['stalk'])
+        filt.sort(*(sort + (("_id", pymongo.ASCENDING),)))
+        expected = [stalk.uuid for stalk in db['stalk'].all(filt)]
+
+        for label, uuids in (("keyset", keyset_pages(db, sort, page_size)),
+                             ("lazy", lazy_slices(db, sort, page_size))):
+            ok = uuids == expected
+            print("{:<7} {:<40} {} of {} rows {}".format(label, sort, len(uuids), len(expected),
+                                                        "ok" if ok else "MISMATCH"))
+            if not ok:
+                failures.append((label, sort))
+    return failures
+
+
+def main(count=40):
+    make_stalk_dataset(count=count)
+    set_thumbnails()
+    failures = check_sorts()
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
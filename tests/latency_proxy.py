@@ -0,0 +1,72 @@
+import socket
+import threading
+import time
+
+
+class LatencyProxy(object):
+    """
+    TCP proxy adding a fixed delay to every chunk forwarded in either direction,
+    used to stand in for a WAN link in front of a local mongod. Counts the bytes it relays.
+    """
+
+    def __init__(self, targetHost="127.0.0.1", targetPort=27017, latencyMs=40, listenPort=0):
+        self._target = (targetHost, targetPort)
+        self._latency = latencyMs / 1000.0
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(("127.0.0.1", listenPort))
+        self._server.listen(64)
+        self._lock = threading.Lock()
+        self._running = False
+        self.bytesUp = 0
+        self.bytesDown = 0
+
+    def port(self):
+        return self._server.getsockname()[1]
+
+    def resetCounters(self):
+        with self._lock:
+            self.bytesUp = 0
+            self.bytesDown = 0
+
+    def start(self):
+        self._running = True
+        thread = threading.Thread(target=self._accept)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        self._server.close()
+
+    def _accept(self):
+        while self._running:
+            try:
+                client, _ = self._server.accept()
+            except socket.error:
+                return
+            upstream = socket.create_connection(self._target)
+            for src, dst, up in ((client, upstream, True), (upstream, client, False)):
+                thread = threading.Thread(target=self._pipe, args=(src, dst, up))
+                thread.daemon = True
+                thread.start()
+
+    def _pipe(self, src, dst, up):
+        try:
+            while True:
+                data = src.recv(65536)
+                if not data:
+                    break
+                time.sleep(self._latency)
+                with self._lock:
+                    if up:
+                        self.bytesUp += len(data)
+                    else:
+                        self.bytesDown += len(data)
+                dst.sendall(data)
+        except socket.error:
+            pass
+        finally:
+            src.close()
+            dst.close()
@@ -0,0 +1,61 @@
+"""
+Object cache check, exits non-zero when DataInterface.get() serves an object as it was before a write.
+
+get() keeps the objects it read for a while. Reads a twig through the interface the document class
+resolves, renames and deletes it through an object of its own, and expects the next get(), on that
+interface and on the handler's, to see each write. Runs against the benchmark database, see
+database_benchmark.use_bench_database.
+"""
+import sys
+
+import mongorm
+from database_benchmark import make_twig_tree
+
+
+def check_writes(twig_uuid):
+    """Return the reads that didn't see the write before them"""
+    from mongorm.interfaces import Twig
+
+    db = mongorm.getHandler()
+    failures = []
+
+    def expect(label, result, expected):
+        print("{:<36} {}".format(label, result))
+        if result != expected:
+            failures.append(label)
+
+    # the interface a document class resolves, held like a caller would between reads
+    interface = Twig.dataInterface()
+    expect("dataInterface() is the handler's", interface is db['twig'], True)
+
+    before = interface.get(twig_uuid)
+    expect("get()", before is not None, True)
+
+    # a twig of its own, loaded by a query rather than through the cache
+    filt = mongorm.getFilter()
+    filt.search(db['twig'], uuid=str(twig_uuid))
+    twig = db['twig'].one(filt)
+    twig.label = before.label + "_renamed"
+    twig.save()
+    expect("get() after save()", db['twig'].get(twig_uuid).label, twig.label)
+    expect("dataInterface().get() after save()", interface.get(twig_uuid).label, twig.label)
+    expect("earlier get() left as it was", before.label, twig.label[:-len("_renamed")])
+
+    twig.delete()
+    expect("get() after delete()", interface.get(twig_uuid), None)
+    return failures
+
+
+def main():
+    make_twig_tree(twigs=4, stalks=8, leafs_per_stalk=1)
+    twig_uuid = mongorm.getHandler()['twig'].objectPrototype._get_collection().find_one()["_id"]
+
+    failures = check_writes(twig_uuid)
+    if failures:
+        print("Stale reads: {}".format(", ".join(failures)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Index regression check, exits non-zero when a query the browser relies on loses its index.
+
+Runs against a local mongod (the benchmark database, see database_benchmark.use_bench_database)
+with query plan recording on, then prints the recorded plans and fails on any collection scan or
+query examining far more documents than it returns.
+"""
+import sys
+import uuid
+
+import mongorm
+from database_benchmark import make_stalk_dataset
+
+
+def ensure_collections():
+    """Create every interface collection with its declared indexes, they may not exist in the benchmark database"""
+    from mongorm.core.datainterface import DATA_OBJECT_MAP
+
+    for prototype in DATA_OBJECT_MAP.values():
+        prototype.ensure_indexes()
+    mongorm.getHandler().refresh()
+
+
+def run_queries(twig_uuids):
+    """The relationship and paging queries the interfaces and data sources issue"""
+    db = mongorm.getHandler()
+
+    queries = [
+        ('stem', {"parent_uuid": str(uuid.uuid4())}),
+        ('stem', {"job": "BENCH"}),
+        ('twig', {"stem_uuid": uuid.uuid4()}),
+        ('stalk', {"twig_uuid": twig_uuids[0]}),
+        ('leaf', {"stalk_uuid": uuid.uuid4()}),
+    ]
+    for interface, filterStrings in queries:
+        filt = mongorm.getFilter()
+        filt.search(db[interface], **filterStrings)
+        db[interface].all(filt)
+        filt.count(refresh=True)
+
+    filt = mongorm.getFilter()
+    filt.search(db['stalk'])
+    filt.setLimit(500)
+    page = db['stalk'].all(filt)
+    filt.setPageAfter(page[-1])
+    db['stalk'].all(filt)
+
+
+def main(count=20000):
+    twig_uuids = make_stalk_dataset(count=count, deleted_ratio=0.1)
+    ensure_collections()
+
+    recorder = mongorm.getPlanRecorder()
+    recorder.clear()
+    recorder.setEnabled(True)
+    run_queries(twig_uuids)
+    recorder.setEnabled(False)
+
+    if not recorder.records():
+        print("No query plans recorded, the server could not explain the queries")
+        return 1
+
+    print(recorder.report())
+    flagged = recorder.flagged()
+    if flagged:
+        print("{} query shape(s) flagged".format(len(flagged)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
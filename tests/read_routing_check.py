@@ -0,0 +1,94 @@
+"""
+Read routing check, exits non-zero when a read policy sends a read to the wrong client.
+
+Uses mongomock stand-ins for the primary and the read replica (MONGO_READ_IP). Each holds a stalk
+labelled after it, so the label a read returns tells which client served it.
+"""
+import datetime
+import os
+import sys
+import uuid
+
+os.environ.setdefault('MONGO_DATABASE', 'jinx_routing')
+os.environ.setdefault('MONGO_PORT', '27017')
+
+import mongoengine
+import mongorm
+from mongorm.base import connection_manager, host_resolver, read_policy
+
+PRIMARY_HOST = "mongomock://primary"
+REPLICA_HOST = "mongomock://replica"
+
+
+class PinnedResolver(host_resolver.HostResolver):
+    def __init__(self, host):
+        super(PinnedResolver, self).__init__(candidates=[host], port=os.getenv('MONGO_PORT'))
+        self._pinned = host
+
+    def resolve(self, refresh=False):
+        return self._pinned
+
+    def invalidate(self):
+        pass
+
+
+def insert_marker(db, label):
+    _id = uuid.uuid4()
+    now = datetime.datetime.now()
+    db['stalk'].insert_one({"_id": _id, "uuid": str(_id), "label": label, "path": "/" + label, "job": "ROUTING",
+                            "created": now, "modified": now, "created_by": "check", "deleted": False,
+                            "archived": False})
+
+
+def use_mock_clients(readHost):
+    manager = connection_manager.ConnectionManager(resolver=PinnedResolver(PRIMARY_HOST))
+    manager.setReadHost(readHost)
+    connection_manager.setManager(manager)
+    insert_marker(manager.db(), "primary")
+    if readHost:
+        manager.readAlias()
+        insert_marker(mongoengine.connection.get_db(manager.READ_ALIAS), "replica")
+    return manager
+
+
+def served_by(policy=read_policy.BROWSE):
+    """Label of the stalk a read with policy returns, the client that served it"""
+    db = mongorm.getHandler()
+    filt = mongorm.getFilter()
+    filt.search(db['stalk'])
+    filt.setReadPolicy(policy)
+    return [stalk.get("label") for stalk in db['stalk'].all(filt, raw=True)]
+
+
+def check_routing():
+    failures = []
+
+    def expect(label, result, expected):
+        print("{:<32} served by {}".format(label, result))
+        if result != [expected]:
+            failures.append(label)
+
+    use_mock_clients(REPLICA_HOST)
+    expect("browse, read replica", served_by(read_policy.BROWSE), "replica")
+    expect("primary, read replica", served_by(read_policy.PRIMARY), "primary")
+    with read_policy.primaryReads():
+        expect("browse in primaryReads()", served_by(read_policy.BROWSE), "primary")
+
+    use_mock_clients(None)
+    expect("browse, no read replica", served_by(read_policy.BROWSE), "primary")
+    expect("primary, no read replica", served_by(read_policy.PRIMARY), "primary")
+
+    connection_manager.getManager().disconnect()
+    return failures
+
+
+def main():
+    failures = check_routing()
+    if failures:
+        print("Wrong client for: {}".format(", ".join(failures)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+Startup cost of the Qt resources: generated Python modules (jinxicon_rcc, style_rc) against the
+binary .rcc files registered with QResource.registerResource. Each case runs in a fresh interpreter.
+"""
+import subprocess
+import sys
+
+PYTHON_MODULE = """
+import time
+start = time.time()
+from qtpy import QtCore
+qtLoaded = time.time()
+import {module}
+elapsed = time.time() - qtLoaded
+print(elapsed, QtCore.QFile("{probe}").exists())
+"""
+
+BINARY_RCC = """
+import time
+start = time.time()
+from qtpy import QtCore
+qtLoaded = time.time()
+import {package}
+QtCore.QResource.registerResource({package}.{rccAttr})
+elapsed = time.time() - qtLoaded
+print(elapsed, QtCore.QFile("{probe}").exists())
+"""
+
+CASES = [
+    ("jinxicon", "jinxicon.jinxicon_rcc", "RCC_FILE", ":/jinxicon/img/ICON_ASSET_LRG.png"),
+    ("qdarkstyle", "qdarkstyle.style_rc", "RCC_FILEPATH", ":/qdarkstyle/style.qss"),
+]
+
+
+def run(code):
+    output = subprocess.check_output([sys.executable, "-c", code])
+    elapsed, found = output.decode().split()
+    return float(elapsed), found == "True"
+
+
+def main(repeat=5):
+    for package, module, rccAttr, probe in CASES:
+        pyTimes = []
+        rccTimes = []
+        for _ in range(repeat):
+            elapsed, found = run(PYTHON_MODULE.format(module=module, probe=probe))
+            assert found, "{} did not register {}".format(module, probe)
+            pyTimes.append(elapsed)
+            elapsed, found = run(BINARY_RCC.format(package=package, rccAttr=rccAttr, probe=probe))
+            assert found, "{}.rcc did not register {}".format(package, probe)
+            rccTimes.append(elapsed)
+
+        print("{:<12} python module: {:.1f} ms   binary rcc: {:.1f} ms".format(
+            package, min(pyTimes) * 1000, min(rccTimes) * 1000))
+
+
+if __name__ == '__main__':
+    main()
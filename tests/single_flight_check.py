@@ -0,0 +1,103 @@
+"""
+Contention check of the single-flight layer under DataInterface.all(), exits non-zero on failure.
+
+Starts many threads asking for the same queries at the same moment and checks that every thread
+gets the full result while the queries ran far fewer times than they were asked for. Runs against
+the benchmark database, see database_benchmark.use_bench_database.
+"""
+import sys
+import threading
+import time
+
+import mongorm
+from mongorm.core import single_flight
+from database_benchmark import make_stalk_dataset
+
+
+def check_group(threads=32):
+    """SingleFlight alone: one slow call shared by every thread, its error raised in every thread"""
+    group = single_flight.SingleFlight()
+    start = threading.Event()
+    calls = []
+    results = []
+    errors = []
+
+    def slow(value):
+        calls.append(value)
+        time.sleep(0.2)
+        if value == "fail":
+            raise RuntimeError("query failed")
+        return value
+
+    def run(value):
+        start.wait()
+        try:
+            results.append(group.do(value, lambda: slow(value))[0])
+        except RuntimeError as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=run, args=("ok" if index % 2 else "fail",)) for index in range(threads)]
+    for worker in workers:
+        worker.start()
+    start.set()
+    for worker in workers:
+        worker.join()
+
+    stats = group.stats()
+    print("group: {} calls for {} threads, {}".format(len(calls), threads, stats))
+    assert results == ["ok"] * (threads // 2), results
+    assert len(errors) == threads // 2
+    assert stats["executed"] + stats["collapsed"] == threads
+    assert group.inFlight() == 0
+    return len(calls) < threads
+
+
+def check_interface(twig_uuids, threads=16, rounds=5):
+    """Every thread asks for the same twig's stalks at once, each round"""
+    db = mongorm.getHandler()
+    expected = {}
+    for twig_uuid in twig_uuids[:rounds]:
+        filt = mongorm.getFilter()
+        filt.search(db['stalk'], twig_uuid=twig_uuid)
+        expected[twig_uuid] = [stalk.uuid for stalk in db['stalk'].all(filt)]
+
+    mongorm.resetStats()
+    failures = []
+    for twig_uuid in twig_uuids[:rounds]:
+        start = threading.Event()
+        results = []
+
+        def run():
+            filt = mongorm.getFilter()
+            filt.search(db['stalk'], twig_uuid=twig_uuid)
+            start.wait()
+            results.append([stalk.uuid for stalk in db['stalk'].all(filt)])
+
+        workers = [threading.Thread(target=run) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        start.set()
+        for worker in workers:
+            worker.join()
+
+        if results != [expected[twig_uuid]] * threads:
+            failures.append(twig_uuid)
+
+    stats = mongorm.stats()
+    print("interface: {} requests, {} finds, {}".format(
+        threads * rounds, stats["commands"].get("find", 0), stats["single_flight"]))
+    if failures:
+        print("Threads got different results for twigs {}".format(failures))
+        return False
+    return stats["single_flight"]["collapsed"] > 0
+
+
+def main(count=20000):
+    ok = check_group()
+    twig_uuids = make_stalk_dataset(count=count)
+    ok = check_interface(twig_uuids) and ok
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())